@@ -1,9 +1,24 @@
+import os
+
 import dash
-from dash import html, dcc, Input, Output, State 
+from dash import html, dcc, Input, Output, State, MATCH
 import dash_bootstrap_components as dbc
+import flask
+
+from utils import assets, jobs, metrics, page_cache
+from utils.cache import CACHES
 
-app = dash.Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.DARKLY])
+# custom_css.css and figures.js are linked through their fingerprinted copies instead of
+# being auto-included. Callback ids are not validated against every page, which would
+# otherwise ship all page layouts (figures included) inside the index html.
+app = dash.Dash(__name__, use_pages=True, assets_ignore=r'custom_css\.css|figures\.js',
+                suppress_callback_exceptions=True,
+                external_stylesheets=[dbc.themes.DARKLY, assets.asset_url('custom_css.css')],
+                external_scripts=[assets.asset_url('figures.js')])
 server = app.server
+metrics.init_app(server)
+page_cache.init_app(app)
+assets.init_app(server)
 
 # the style arguments for the sidebar. We use position:fixed and a fixed width
 SIDEBAR_STYLE = {
@@ -33,9 +48,33 @@ menu_link_style = {'background-color': 'rgb(0,0,0,0.0)',
                      'cursor':'pointer',
                      'margin-left':'15px'}
 
+def generate_nav():
+    # top level pages get a link, each pages/<section>/ folder a collapsible menu
+    links = []
+    sections = {}
+    for page in dash.page_registry.values():
+        if not page.get('nav', True):
+            continue
+        folders = page['module'].split('.')[1:-1]
+        if folders:
+            sections.setdefault(folders[0], []).append(page)
+        else:
+            links.append(dbc.NavLink(page['name'], href=page['path'], style=menu_link_style))
+    
+    for section, pages in sections.items():
+        links += [
+            dbc.NavLink("▾ " + section.replace('_', ' ').title(), active="exact", 
+                        id={'type': 'drop-menu', 'section': section}, style=menu_drop_style),
+            dbc.Collapse(
+                [dbc.NavLink(page['name'], href=page['path'], style=menu_link_style) for page in pages],
+                id={'type': 'collapse-menu', 'section': section}, is_open=True
+            ),
+        ]
+    return links
+
 sidebar = html.Div(
     [
-        html.Img(src='/assets/juan_mora_logo_dark.PNG', height=82, width=246, className='center'),
+        html.Img(src=assets.asset_url('juan_mora_logo_dark.PNG'), height=82, width=246, className='center'),
         # html.Hr(
         #     style={'height':'1px', 'color':'var(--highlight)', 'backgroundColor':'var(--highlight)', 
         #            'borderWidth':'1px', 'borderColor':'var(--highlight)', 'opacity':'1',
@@ -52,46 +91,7 @@ sidebar = html.Div(
                            'margin-top':'20px',
                            'background-color': 'rgb(36,42,68,1)'}),
         dbc.Nav(
-            [
-                dbc.NavLink("Home", href="/",  style=menu_link_style),
-                dbc.NavLink("▾ About", active="exact", id="drop-menu-about", style=menu_drop_style),
-                dbc.Collapse(
-                    [
-                        dbc.NavLink(
-                            dash.page_registry['pages.about.professional_experience']["name"], 
-                            href=dash.page_registry['pages.about.professional_experience']["path"], 
-                            style=menu_link_style
-                        ),
-                        dbc.NavLink(
-                            dash.page_registry['pages.about.why_a_webpage']["name"],
-                            href=dash.page_registry['pages.about.why_a_webpage']["path"], 
-                            style=menu_link_style
-                        ),
-                        dbc.NavLink(
-                            dash.page_registry['pages.about.acknowledgments']["name"],
-                            href=dash.page_registry['pages.about.acknowledgments']["path"], 
-                            style=menu_link_style
-                        )
-                    ],
-                    id="collapse-menu-about", is_open=True
-                ),
-                dbc.NavLink("▾ Fixed Income", active="exact", id="drop-menu-fixed_income", style=menu_drop_style),
-                dbc.Collapse(
-                    [
-                        dbc.NavLink(
-                            dash.page_registry['pages.fixed_income.discussion_br']["name"],
-                            href=dash.page_registry['pages.fixed_income.discussion_br']["path"], 
-                            style=menu_link_style
-                        ),
-                        # dbc.NavLink(
-                        #     dash.page_registry['pages.fixed_income.sample_app']["name"], 
-                        #     href=dash.page_registry['pages.fixed_income.sample_app']["path"],
-                        #     style=menu_link_style
-                        # )
-                    ],
-                    id="collapse-menu-fixed_income", is_open=True
-                )
-            ],
+            generate_nav(),
             vertical=True,
             pills=True,
         ),
@@ -101,26 +101,25 @@ sidebar = html.Div(
 
 app.layout = html.Div([dcc.Location(id="url"), sidebar, dash.page_container])
 
-@app.callback(
-    Output("collapse-menu-about", "is_open"),
-    [Input("drop-menu-about", "n_clicks")],
-    [State("collapse-menu-about", "is_open")],
+app.clientside_callback(
+    """
+    function(n, is_open) {
+        return n ? !is_open : is_open;
+    }
+    """,
+    Output({'type': 'collapse-menu', 'section': MATCH}, 'is_open'),
+    Input({'type': 'drop-menu', 'section': MATCH}, 'n_clicks'),
+    State({'type': 'collapse-menu', 'section': MATCH}, 'is_open'),
+    prevent_initial_call=True,
 )
-def toggle_collapse_about(n, is_open):
-    if n:       
-        return not is_open
-    return is_open
 
-@app.callback(
-    Output("collapse-menu-fixed_income", "is_open"),
-    [Input("drop-menu-fixed_income", "n_clicks")],
-    [State("collapse-menu-fixed_income", "is_open")],
-)
-def toggle_collapse_fixed_income(n, is_open):
-    if n:       
-        return not is_open
-    return is_open
+@server.route("/cache-stats")
+def cache_stats():
+    return flask.jsonify({name: cache.stats() for name, cache in CACHES.items()})
 
 
 if __name__ == "__main__":
+    # background jobs run next to the server process, not the reloader
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        jobs.start_workers()
     app.run(debug=True)
@@ -0,0 +1,213 @@
+"""Benchmarks for startup, page building, pricing kernels and payload sizes.
+
+    python -m benchmarks.run [--output FILE] [--save-baseline] [--tolerance 0.25] [--min-seconds 0.005]
+
+Results are written as JSON (benchmarks/results.json by default) and compared
+with benchmarks/baseline.json when it exists; the exit status is 1 when any
+metric regressed by more than the tolerance. Run from the repository root.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS = ROOT / 'benchmarks' / 'results.json'
+BASELINE = ROOT / 'benchmarks' / 'baseline.json'
+
+# run in a fresh interpreter: shared dependencies are imported first so each
+# page is timed on its own, the way Dash executes it at startup
+PAGE_IMPORT = '''
+import importlib.util, sys, time, warnings
+warnings.simplefilter('ignore')
+import dash, dash_bootstrap_components, numpy, pandas, plotly.express
+app = dash.Dash(__name__, use_pages=True, pages_folder='')
+spec = importlib.util.spec_from_file_location(sys.argv[2], sys.argv[1])
+start = time.perf_counter()
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - start)
+'''
+APP_IMPORT = '''
+import time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+'''
+
+
+def metric(value, unit, better='lower'):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def best_of(func, repeat=5, number=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start)/number)
+    return min(times)
+
+
+def run_python(code, *args):
+    out = subprocess.run([sys.executable, '-c', code, *args], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.split()[-1])
+
+
+def bench_startup(repeat=3):
+    results = {'import.app': metric(min(run_python(APP_IMPORT) for _ in range(repeat)), 's')}
+    for path in sorted((ROOT / 'pages').rglob('*.py')):
+        module = '.'.join(path.relative_to(ROOT).with_suffix('').parts)
+        results[f'import.{module}'] = metric(min(run_python(PAGE_IMPORT, str(path), module)
+                                                 for _ in range(repeat)), 's')
+    return results
+
+
+def bench_figures():
+    from utils.artifacts import FIGURES
+    return {f'figure.{name}': metric(best_of(spec['builder'], repeat=3), 's')
+            for name, spec in FIGURES.items()}
+
+
+def bench_kernels():
+    from fixed_income import bond_price, bond_yield, bootstrap, load_error_grid, return_error_jm, return_jm_batch
+    from fixed_income.simulation import simulate
+    from funds import load_panel
+    rng = np.random.default_rng(0)
+    n = 100_000
+    T = rng.integers(1, 31, n)
+    c, y0, y1 = rng.uniform(0, 0.1, n), rng.uniform(0, 0.1, n), rng.uniform(0, 0.1, n)
+
+    scalar = best_of(lambda: [return_error_jm(5, 0.04, 0.04, y) for y in y1[:1000]], repeat=3)/1000
+    batch = best_of(lambda: return_jm_batch(T, c, y0, y1), repeat=3)/n
+    prices = bond_price(c, y1, T)
+    solve = best_of(lambda: bond_yield(prices, c, T), repeat=3)/n
+    grid = load_error_grid()
+    point = best_of(lambda: [grid.lookup(0.04, 5, 0.04, y - 0.04, 1) for y in y1[:1000]], repeat=3)/1000
+    lookup = best_of(lambda: grid.lookup(c, T, y0, y1 - y0, 1), repeat=3)/n
+    panel = load_panel()
+    query = best_of(lambda: panel.window('2018-01-01', '2022-12-31', 'monthly'), number=1000)
+    paths = best_of(lambda: simulate(50_000, workers=1), repeat=3)/50_000
+    tenors = np.arange(1, 361)/12
+    par = 0.03 + np.cumsum(rng.normal(0, 0.0005, 360))
+    dense = best_of(lambda: bootstrap(tenors, par, freq=12), number=10)
+    sparse = best_of(lambda: bootstrap(tenors[2::3], par[2::3], freq=12, short_rate=0.03))
+    return {'kernel.bootstrap_360_pillars': metric(dense, 's'),
+            'kernel.bootstrap_120_sparse_pillars': metric(sparse, 's'),
+            'kernel.bond_yield': metric(1/solve, 'bonds/s', 'higher'),
+            'kernel.error_grid_point': metric(1/point, 'calls/s', 'higher'),
+            'kernel.error_grid_batch': metric(1/lookup, 'bonds/s', 'higher'),
+            'kernel.panel_monthly_query': metric(query, 's'),
+            'kernel.return_error_jm': metric(1/scalar, 'calls/s', 'higher'),
+            'kernel.return_jm_batch': metric(1/batch, 'bonds/s', 'higher'),
+            'kernel.simulate': metric(1/paths, 'paths/s', 'higher')}
+
+
+def explorer_request(maturity):
+    values = {'explorer-maturity': maturity, 'explorer-yield': 4, 'explorer-horizon': 12,
+              'explorer-coupons': [0, 20], 'explorer-n-coupons': 5, 'explorer-freq': 1}
+    return {
+        'output': 'graph-explorer.figure',
+        'outputs': {'id': 'graph-explorer', 'property': 'figure'},
+        'inputs': [{'id': k, 'property': 'value', 'value': v} for k, v in values.items()],
+        'changedPropIds': ['explorer-maturity.value'],
+    }
+
+
+def zoom_request(graph, start, end):
+    return {
+        'output': f'{graph}-data.data',
+        'outputs': {'id': f'{graph}-data', 'property': 'data'},
+        'inputs': [{'id': graph, 'property': 'relayoutData',
+                    'value': {'xaxis.range[0]': start, 'xaxis.range[1]': end}}],
+        'changedPropIds': [f'{graph}.relayoutData'],
+    }
+
+
+def bench_server(requests=100):
+    import dash
+    import app
+    from utils.page_cache import page_request
+
+    client = app.server.test_client()
+    client.get('/')
+    results = {}
+    for page in dash.page_registry.values():
+        response = client.post('/_dash-update-component', json=page_request(page['path']))
+        results[f'payload.{page["module"]}'] = metric(len(response.data), 'bytes')
+
+    scenarios = {
+        'pages': [page_request(p['path']) for p in dash.page_registry.values()],
+        'explorer': [explorer_request(int(T)) for T in np.random.default_rng(0).integers(1, 31, 30)],
+        'zoom': [zoom_request('graph-fundE', f'{y}-01-01', f'{y}-06-30') for y in range(2018, 2023)],
+    }
+    for name, bodies in scenarios.items():
+        latencies = []
+        for i in range(requests):
+            start = time.perf_counter()
+            response = client.post('/_dash-update-component', json=bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, (name, response.status_code)
+        results[f'latency.{name}.p50'] = metric(float(np.percentile(latencies, 50)), 's')
+        results[f'latency.{name}.p99'] = metric(float(np.percentile(latencies, 99)), 's')
+    return results
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None or not old['value']:
+            continue
+        change = new['value']/old['value'] - 1
+        worse = change > tolerance if new['better'] == 'lower' else change < -tolerance
+        # sub-millisecond timings are mostly noise
+        if new['unit'] == 's' and abs(new['value'] - old['value']) < min_seconds:
+            worse = False
+        print(f'{name:<55} {old["value"]:>14.6g} -> {new["value"]:>14.6g} {new["unit"]:<8} '
+              f'{change:+8.1%}{"  REGRESSION" if worse else ""}')
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', type=Path, default=RESULTS)
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='also store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative change before failing')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='timing changes smaller than this are never regressions')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    sys.path.insert(0, str(ROOT))
+    results = {}
+    for bench in (bench_startup, bench_kernels, bench_server, bench_figures):
+        results.update(bench())
+
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f'results written to {args.output}')
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f'baseline saved to {args.baseline}')
+    elif args.baseline.exists():
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.min_seconds)
+        if regressions:
+            print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+            sys.exit(1)
+    else:
+        for name, result in results.items():
+            print(f'{name:<55} {result["value"]:>14.6g} {result["unit"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Precompute the site's build artifacts.
+
+Run before starting the server (and after changing data or figure code):
+
+    python build.py [--force]
+
+Importing the app registers every page and, with them, their figures.
+"""
+import argparse
+import time
+
+from fixed_income import build_grid
+from funds import build_panel, convert_all
+from utils.artifacts import build_all
+from utils.assets import build_assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='rebuild artifacts even if up to date')
+    args = parser.parse_args()
+
+    import app  # noqa: F401
+
+    start = time.perf_counter()
+    for name, path in convert_all().items():
+        print(f'{name:<12} {path.relative_to(path.parents[2])}')
+    path = build_panel(force=args.force)
+    print(f'{"panel":<12} {path.relative_to(path.parents[2])}')
+    for name, path in build_assets().items():
+        print(f'{name:<12} {path.name}')
+    for name, path in build_all(force=args.force).items():
+        print(f'{name:<12} {path.name}')
+    path = build_grid(force=args.force)
+    print(f'{"error_grid":<12} {path.relative_to(path.parents[2])}')
+    print(f'artifacts ready in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
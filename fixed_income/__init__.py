@@ -0,0 +1,5 @@
+from fixed_income.analytics import year_fraction, bond_analytics, bond_price, bond_yield, cash_received
+from fixed_income.returns import return_jm_batch, return_bm_batch, return_error_jm
+from fixed_income.curve import Curve, bootstrap, get_curve
+from fixed_income.simulation import simulate, error_table
+from fixed_income.error_grid import ErrorGrid, build_grid, load_error_grid
@@ -0,0 +1,165 @@
+import numpy as np
+
+FACE = 100
+DAY_COUNTS = ('30/360', 'ACT/365')
+
+# below this value of n*log(1+i) the closed forms lose precision and the
+# moments are taken from their Taylor series around a zero rate instead
+_SERIES_CUTOFF = 1e-2
+
+
+def year_fraction(start, end, basis='30/360'):
+    """Accrual fraction between two (arrays of) dates under 30/360 or ACT/365."""
+    start = np.asarray(start, dtype='datetime64[D]')
+    end = np.asarray(end, dtype='datetime64[D]')
+    if basis == 'ACT/365':
+        return (end - start).astype(np.float64)/365
+    if basis != '30/360':
+        raise ValueError(f"unknown day count basis {basis!r}, expected one of {DAY_COUNTS}")
+
+    def ymd(d):
+        y = d.astype('datetime64[Y]').astype(np.int64) + 1970
+        m = d.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        day = (d - d.astype('datetime64[M]')).astype(np.int64) + 1
+        return y, m, day
+
+    y1, m1, d1 = ymd(start)
+    y2, m2, d2 = ymd(end)
+    d1 = np.minimum(d1, 30)
+    d2 = np.where((d2 == 31) & (d1 == 30), 30, d2)
+    return (360*(y2-y1) + 30*(m2-m1) + (d2-d1))/360
+
+
+def _power_sums(n):
+    # sum_{k=1}^{n} k^p for p = 0..6
+    n2 = n*n
+    return (n,
+            n*(n+1)/2,
+            n*(n+1)*(2*n+1)/6,
+            (n*(n+1)/2)**2,
+            n*(n+1)*(2*n+1)*(3*n2+3*n-1)/30,
+            n2*(n+1)**2*(2*n2+2*n-1)/12,
+            n*(n+1)*(2*n+1)*(3*n2*n2+6*n2*n-3*n+1)/42)
+
+
+def _annuity_moments(L, n):
+    """S_m = sum_{k=1}^{n} k^m exp(-k L) for m = 0, 1, 2, in O(1) per element."""
+    w = -np.expm1(-L)           # 1 - v
+    v = 1 - w
+    E = np.exp(-n*L)            # v^n
+    F = -np.expm1(-n*L)         # 1 - v^n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        S0 = v*F/w
+        S1 = v*(F - n*E*w)/w**2
+        S2 = v*(F*(2-w) - n*E*w*(2+n*w))/w**3
+
+    small = np.abs(n*L) < _SERIES_CUTOFF
+    if np.any(small):
+        P = _power_sums(n)
+        coef = (1, -L, L**2/2, -L**3/6, L**4/24)
+        S0 = np.where(small, sum(a*p for a, p in zip(coef, P[0:5])), S0)
+        S1 = np.where(small, sum(a*p for a, p in zip(coef[:4], P[1:5])) + coef[4]*P[5], S1)
+        S2 = np.where(small, sum(a*p for a, p in zip(coef[:4], P[2:6])) + coef[4]*P[6], S2)
+    return S0, S1, S2
+
+
+def _schedule(T, freq):
+    # remaining coupons n and the (non positive) offset s of the cashflow
+    # times k + s, in coupon periods, of a bond maturing in T years
+    x = np.asarray(T, dtype=np.float64)*freq
+    n = np.maximum(np.ceil(x - 1e-9), 0)
+    return n, x - n
+
+
+def bond_analytics(c, y, T, freq=1):
+    """Dirty price, modified duration and convexity of a fixed coupon bond.
+
+    c is the annual coupon rate, y the yield compounded freq times a year and
+    T the time to maturity in years (fractional values are allowed, in which
+    case the next coupon is less than a full period away). Inputs broadcast
+    and the cost does not depend on the number of cashflows. Matured bonds
+    have a price of zero and NaN risk measures.
+    """
+    c, y, T = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (c, y, T)))
+    i = y/freq
+    L = np.log1p(i)
+    n, s = _schedule(T, freq)
+    C = c*FACE/freq
+
+    S0, S1, S2 = _annuity_moments(L, n)
+    vs = np.exp(-s*L)
+    E = np.exp(-n*L)*FACE
+    P = vs*(C*S0 + E)
+    M1 = vs*(C*(S1 + s*S0) + (n+s)*E)
+    M2 = vs*(C*(S2 + 2*s*S1 + s**2*S0) + (n+s)**2*E)
+
+    alive = n > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mod_dur = np.where(alive, M1/(freq*(1+i)*P), np.nan)
+        convex = np.where(alive, (M2+M1)/(freq**2*(1+i)**2*P), np.nan)
+    return np.where(alive, P, 0.0), mod_dur, convex
+
+
+def bond_price(c, y, T, freq=1):
+    return bond_analytics(c, y, T, freq)[0]
+
+
+def bond_yield(price, c, T, freq=1, tol=1e-12, max_iter=20):
+    """Yields (compounded freq times a year) matching the dirty prices of a batch of bonds.
+
+    All arguments broadcast, including freq. Newton iterations run on every
+    bond at once; bonds that do not converge (overshooting below a -100%
+    period rate, or a tiny duration) are solved again by bisection. Returns
+    the tuple (y, converged): y is NaN for matured bonds and non positive
+    prices, and converged flags bonds whose yield reprices within tol per
+    100 of face value.
+    """
+    price, c, T, freq = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (price, c, T, freq)))
+    valid = (price > 0) & (_schedule(T, freq)[0] > 0)
+
+    # start from the textbook approximation (coupon plus pull to par over
+    # the average of price and face)
+    years = np.maximum(T, 1/freq)
+    y = np.where(valid, (c*FACE + (FACE - price)/years)/((FACE + price)/2), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iter):
+            P, mod_dur, _ = bond_analytics(c, y, T, freq)
+            step = (P - price)/(mod_dur*P)
+            y = y + step
+            if not np.any(np.abs(step) > tol):
+                break
+        error = np.abs(bond_price(c, y, T, freq) - price)
+        failed = valid & ~(error <= tol*FACE)
+
+        if np.any(failed):
+            y[failed] = _bisect_yield(price[failed], c[failed], T[failed], freq[failed], tol)
+            error[failed] = np.abs(bond_price(c[failed], y[failed], T[failed], freq[failed]) - price[failed])
+    return y, valid & (error <= tol*FACE)
+
+
+def _bisect_yield(price, c, T, freq, tol, max_iter=200):
+    # prices fall with the yield; the bracket starts at a -99% period rate
+    # and its top doubles until it prices below target
+    lo = -0.99*freq
+    hi = np.ones_like(price)
+    for _ in range(60):
+        low = bond_price(c, hi, T, freq) > price
+        if not np.any(low):
+            break
+        hi = np.where(low, 2*hi, hi)
+    lo = lo + np.zeros_like(price)
+    for _ in range(max_iter):
+        mid = (lo + hi)/2
+        above = bond_price(c, mid, T, freq) > price
+        lo, hi = np.where(above, mid, lo), np.where(above, hi, mid)
+        if np.all(hi - lo < tol):
+            break
+    return (lo + hi)/2
+
+
+def cash_received(c, T, dt, freq=1):
+    """Coupons and redemption paid by the bond during the next dt years."""
+    c, T, dt = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (c, T, dt)))
+    n0, _ = _schedule(T, freq)
+    n1, _ = _schedule(T - dt, freq)
+    return (n0-n1)*c*FACE/freq + np.where((n0 > 0) & (n1 == 0), FACE, 0.0)
@@ -0,0 +1,115 @@
+import numpy as np
+
+from fixed_income.analytics import FACE, bond_yield
+from utils.cache import LRUCache
+
+# bootstrapped curves per snapshot (tenors, par yields, frequency, short rate)
+curve_cache = LRUCache('curves', max_bytes=16*1024**2)
+
+_NEWTON_ITERATIONS = 50
+_NEWTON_TOL = 1e-14
+
+
+class Curve:
+    """Zero curve on a coupon grid, rates compounded freq times a year.
+
+    Zero rates are linear in time between the grid points, start from the
+    short rate at time 0 (or the first rate when there is none) and are flat
+    after the last point. Every method broadcasts over its arguments.
+    """
+
+    def __init__(self, times, zeros, freq=1, short_rate=None):
+        self.times = np.asarray(times, dtype=np.float64)
+        self.zeros = np.asarray(zeros, dtype=np.float64)
+        self.freq = freq
+        self.short_rate = self.zeros[0] if short_rate is None else short_rate
+        self.discount_factors = (1 + self.zeros/freq)**(-freq*self.times)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.times.nbytes + self.zeros.nbytes + self.discount_factors.nbytes
+
+    def zero(self, t):
+        return np.interp(t, np.r_[0, self.times], np.r_[self.short_rate, self.zeros])
+
+    def discount(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        return (1 + self.zero(t)/self.freq)**(-self.freq*t)
+
+    def forward(self, t1, t2):
+        """Forward rate between t1 and t2 implied by the curve, compounded freq times a year."""
+        t1, t2 = np.asarray(t1, dtype=np.float64), np.asarray(t2, dtype=np.float64)
+        return self.freq*((self.discount(t1)/self.discount(t2))**(1/(self.freq*(t2 - t1))) - 1)
+
+    def holding_return(self, h):
+        """Return over the next h years of any position, when the forward rates are realized."""
+        return 1/self.discount(h) - 1
+
+    def bond_price(self, c, T, h=0):
+        """Dirty price at time h implied by the curve of a bond with coupon rate c maturing at T.
+
+        Coupons are paid freq times a year counting back from T; only the
+        cashflows after h are included.
+        """
+        c, T, h = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (c, T, h)))
+        n = np.maximum(np.ceil((T - h)*self.freq - 1e-9), 0)
+        j = np.arange(int(n.max()) if n.size else 0)
+        times = T[...,None] - j/self.freq
+        cash = np.where(j < n[...,None], FACE*c[...,None]/self.freq + FACE*(j == 0), 0)
+        return (cash*self.discount(times)).sum(axis=-1)/self.discount(h)
+
+    def implied_yield(self, c, T, h):
+        """Yield at time h of a bond maturing at T when the forward rates are realized."""
+        return bond_yield(self.bond_price(c, T, h), c, np.asarray(T) - h, self.freq)[0]
+
+
+def bootstrap(tenors, par_yields, freq=1, short_rate=None):
+    """Curve from par yields of bonds maturing at the tenors (in years, on the coupon grid).
+
+    The zero rate of each pillar is solved so its par bond prices at 100,
+    with the grid points between pillars interpolated linearly in zero rate.
+    When there is a pillar at every coupon date the whole curve is solved at
+    once, in closed form.
+    """
+    tenors = np.asarray(tenors, dtype=np.float64)
+    par = np.asarray(par_yields, dtype=np.float64)/freq
+    pillars = np.rint(tenors*freq).astype(np.int64)
+    if np.any(np.diff(pillars) <= 0) or pillars[0] < 1 or not np.allclose(pillars, tenors*freq):
+        raise ValueError('tenors must be increasing multiples of the coupon period')
+    k = np.arange(1, pillars[-1] + 1)
+    times = k/freq
+
+    if len(pillars) == len(k):
+        # with A_n the annuity of the first n periods, a par bond gives
+        # A_n = (A_{n-1} + 1)/(1 + c_n), whose solution is a ratio of
+        # cumulative products
+        growth = np.cumprod(1 + par)
+        annuity = np.cumsum(np.r_[1, growth[:-1]])/growth
+        df = (1 - par*np.r_[0, annuity[:-1]])/(1 + par)
+        return Curve(times, freq*(df**(-1/k) - 1), freq, short_rate)
+
+    zeros = np.empty(len(k))
+    t_prev, z_prev, n_prev, annuity = 0, short_rate, 0, 0
+    for n, c in zip(pillars, par):
+        seg = slice(n_prev, n)
+        w = np.ones(n - n_prev) if z_prev is None else (times[seg] - t_prev)/(times[n-1] - t_prev)
+        base = 0 if z_prev is None else z_prev
+        z = c*freq
+        for _ in range(_NEWTON_ITERATIONS):
+            growth = 1 + (base + w*(z - base))/freq
+            df = growth**-k[seg]
+            ddf = -k[seg]/freq*df/growth*w
+            step = (c*(annuity + df.sum()) + df[-1] - 1)/(c*ddf.sum() + ddf[-1])
+            z -= step
+            if abs(step) < _NEWTON_TOL:
+                break
+        zeros[seg] = base + w*(z - base)
+        annuity += df.sum()
+        t_prev, z_prev, n_prev = times[n-1], z, n
+    return Curve(times, zeros, freq, short_rate)
+
+
+def get_curve(tenors, par_yields, freq=1, short_rate=None):
+    """Bootstrapped curve for a snapshot of par yields, computed once per snapshot."""
+    key = (tuple(float(t) for t in tenors), tuple(float(y) for y in par_yields), freq,
+           None if short_rate is None else float(short_rate))
+    return curve_cache.get_or_compute(key, lambda: bootstrap(tenors, par_yields, freq, short_rate))
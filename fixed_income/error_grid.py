@@ -0,0 +1,150 @@
+"""Precomputed grid of Johansson's method errors, interpolated instead of repriced.
+
+The grid covers annual coupon bonds over the ranges of the error explorer. It
+is built once (build.py, or on first use) under build/error_grid and
+memory-mapped, so all workers share one copy. Lookups are multilinear and
+come with an error bound estimated from the curvature of the grid, which
+tells when the interpolated value can be trusted.
+"""
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from fixed_income.returns import return_jm_batch
+
+ROOT = Path(__file__).resolve().parents[1]
+GRID_DIR = ROOT / 'build' / 'error_grid'
+GRID_VERSION = 1
+
+# coupon, maturity, start yield and horizon in the units of return_jm_batch,
+# dy is the change in yield over the horizon
+AXES = {
+    # denser near zero, where the error bends most with the coupon
+    'coupon': np.r_[0, 0.0025, 0.005, np.linspace(0.01, 0.20, 20)],
+    'maturity': np.array([1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 15, 20, 25, 30], dtype=np.float64),
+    'start_yield': np.linspace(0, 0.10, 21),
+    'dy': np.linspace(-0.06, 0.06, 49),
+    'horizon': np.array([1, 2, 3, 6, 9, 12])/12,
+}
+SOURCES = ['fixed_income/analytics.py', 'fixed_income/returns.py', 'fixed_income/error_grid.py']
+
+_grid = None
+_lock = threading.Lock()
+
+
+def grid_key():
+    h = hashlib.sha256(f'{GRID_VERSION}'.encode())
+    for axis in AXES.values():
+        h.update(axis.tobytes())
+    for source in SOURCES:
+        h.update((ROOT / source).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _curvature_bound(values, axes):
+    # per cell: sum over the axes of h^2/8 times the largest second derivative
+    # (from divided differences) at the corners of the cell, the error bound
+    # of linear interpolation along each axis
+    bound = np.zeros(tuple(len(x) - 1 for x in axes))
+    for d, x in enumerate(axes):
+        v = np.moveaxis(values, d, -1).astype(np.float64)
+        h = np.diff(x)
+        f2 = 2*np.diff(np.diff(v, axis=-1)/h, axis=-1)/(h[:-1] + h[1:])
+        # at the ends of the axis, extrapolate the second derivative linearly
+        first = np.maximum(np.abs(f2[...,0]), np.abs(2*f2[...,0] - f2[...,1]))
+        last = np.maximum(np.abs(f2[...,-1]), np.abs(2*f2[...,-1] - f2[...,-2]))
+        f2 = np.concatenate([first[...,None], np.abs(f2), last[...,None]], axis=-1)
+        b = np.moveaxis(np.maximum(f2[...,:-1], f2[...,1:])*h**2/8, -1, d)
+        for e in range(len(axes)):
+            if e != d:
+                b = np.maximum(b.take(range(len(axes[e]) - 1), axis=e), b.take(range(1, len(axes[e])), axis=e))
+        bound += b
+    return bound
+
+
+def build_grid(force=False):
+    """Compute the error grid and its bounds, unless they are up to date."""
+    path = GRID_DIR / grid_key()
+    if (path / 'meta.json').exists() and not force:
+        return path
+    c, T, y0, dy, dt = np.meshgrid(*AXES.values(), indexing='ij', sparse=True)
+    _, _, values = return_jm_batch(T, c, y0, y0 + dy, dt)
+    values = np.broadcast_to(values, tuple(len(x) for x in AXES.values()))
+
+    path.mkdir(parents=True, exist_ok=True)
+    for name, array in (('values', values.astype(np.float32)),
+                        ('bound', _curvature_bound(values, list(AXES.values())).astype(np.float32))):
+        tmp = path / f'{name}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, path / f'{name}.npy')
+    (path / 'meta.json').write_text(json.dumps({name: axis.tolist() for name, axis in AXES.items()}))
+    # grids of older versions (mapped files stay readable until unmapped)
+    for old in GRID_DIR.iterdir():
+        if old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+class ErrorGrid:
+    """Memory-mapped error grid with vectorized multilinear lookups."""
+
+    def __init__(self, path):
+        self.axes = [np.asarray(axis) for axis in json.loads((path / 'meta.json').read_text()).values()]
+        self.values = np.load(path / 'values.npy', mmap_mode='r')
+        self.bound = np.load(path / 'bound.npy', mmap_mode='r')
+        self._values = self.values.reshape(-1)
+        self._bound = self.bound.reshape(-1)
+        self._strides = np.array([int(np.prod(self.values.shape[d+1:])) for d in range(self.values.ndim)])
+        self._cell_strides = np.array([int(np.prod(self.bound.shape[d+1:])) for d in range(self.bound.ndim)])
+        # the 2^d corners of a cell, as offsets into the flat grid
+        self._corners = np.array(list(itertools.product((0, 1), repeat=self.values.ndim)), dtype=bool)
+        self._offsets = self._corners @ self._strides
+        self._positions = [np.arange(len(axis), dtype=np.float64) for axis in self.axes]
+        self._last = np.array([len(axis) - 2 for axis in self.axes])
+        self._low = np.array([axis[0] for axis in self.axes]) - 1e-9
+        self._high = np.array([axis[-1] for axis in self.axes]) + 1e-9
+
+    def lookup(self, c, T, y0, dy, dt):
+        """Interpolated JM error (percentage points, as return_jm_batch) and its error bound.
+
+        Arguments broadcast. The error jumps when the bond pays a coupon, so
+        only maturities on a coupon date (whole years) are covered; other
+        maturities, and points outside the grid, get an infinite bound.
+        """
+        q = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (c, T, y0, dy, dt)))
+        shape = q[0].shape
+        X = np.stack([x.ravel() for x in q], axis=1)
+        # fractional position of every coordinate along its axis
+        pos = np.column_stack([np.interp(x, axis, self._positions[d]) for d, (axis, x) in enumerate(zip(self.axes, X.T))])
+        i = np.minimum(pos.astype(np.intp), self._last)
+        w = pos - i
+        node = i @ self._strides
+        cell = i @ self._cell_strides
+
+        weights = np.where(self._corners, w[:,None,:], 1 - w[:,None,:]).prod(axis=2)
+        error = (self._values[node[:,None] + self._offsets]*weights).sum(axis=1)
+        covered = ((X >= self._low) & (X <= self._high)).all(axis=1) & (np.abs(X[:,1] - np.rint(X[:,1])) < 1e-9)
+        bound = np.where(covered, self._bound[cell], np.inf)
+        return error.reshape(shape), bound.reshape(shape)
+
+    def is_accurate(self, c, T, y0, dy, dt, tolerance=0.01):
+        """Whether JM is within tolerance (percentage points) of the exact return, from the grid alone."""
+        error, bound = self.lookup(c, T, y0, dy, dt)
+        return np.abs(error) + bound <= tolerance
+
+
+def load_error_grid():
+    """Shared handle on the error grid, building it first if it is missing or stale."""
+    global _grid
+    if _grid is None:
+        with _lock:
+            if _grid is None:
+                _grid = ErrorGrid(build_grid())
+    return _grid
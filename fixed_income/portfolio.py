@@ -0,0 +1,143 @@
+"""Returns of a portfolio of bond holdings over a horizon, holding by holding.
+
+Holdings files are CSVs with the HOLDING_COLUMNS (rates in percent, maturity
+in years, notional in face value). They are read in chunks and every chunk is
+reduced to per holding results appended to a flat float64 file, plus running
+portfolio sums, so memory depends on the chunk size and not on the file.
+"""
+import base64
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fixed_income.analytics import FACE, bond_price
+from fixed_income.returns import return_bm_batch, return_jm_batch
+from utils.cache import LRUCache
+
+ROOT = Path(__file__).resolve().parents[1]
+UPLOAD_DIR = ROOT / 'build' / 'uploads'
+
+HOLDING_COLUMNS = ('coupon', 'maturity', 'notional', 'start_yield', 'end_yield')
+# row is the holding's row in the file (from 1), returns and errors are in
+# percent and value is the market value at the start
+RESULT_COLUMNS = ('row',) + HOLDING_COLUMNS + ('value', 'exact', 'jm', 'bm', 'error_jm', 'error_bm')
+_VALUE, _RETURNS, _ERRORS = 6, slice(7, 10), slice(10, 12)
+CHUNK_ROWS = 50_000
+# uploads are named by their content hash, nothing else is read or written
+UPLOAD_NAME = re.compile('[0-9a-f]{16}')
+
+# sort orders of result files, per (file, column, direction)
+order_cache = LRUCache('portfolio_sort', max_bytes=64*1024**2)
+
+
+def save_holdings(contents):
+    """Store an uploaded file (dcc.Upload contents) under its content hash and return the hash."""
+    data = contents.split(',', 1)[1]
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    # uploads are handled by threads too: the pid alone is not unique
+    tmp = UPLOAD_DIR / f'upload.{uuid.uuid4().hex}.tmp'
+    h = hashlib.sha256()
+    with open(tmp, 'wb') as f:
+        # decode in blocks (a multiple of 4 characters) instead of all at once
+        block = 4*2**20
+        for start in range(0, len(data), block):
+            chunk = base64.b64decode(data[start:start + block])
+            h.update(chunk)
+            f.write(chunk)
+    name = h.hexdigest()[:16]
+    os.replace(tmp, UPLOAD_DIR / f'{name}.csv')
+    return name
+
+
+def holding_returns(holdings, dt=1, freq=1):
+    """(rows, RESULT_COLUMNS) array of exact, JM and BM returns for a frame of holdings.
+
+    Rows are numbered from the frame's (zero based) index.
+    """
+    c, T, notional, y0, y1 = (holdings[col].to_numpy(dtype=np.float64) for col in HOLDING_COLUMNS)
+    c, y0, y1 = c/100, y0/100, y1/100
+    r, r_jm, error_jm = return_jm_batch(T, c, y0, y1, dt, freq)
+    r_bm = return_bm_batch(T, c, y0, y1, dt, freq)
+    value = notional*bond_price(c, y0, T, freq)/FACE
+    return np.column_stack([holdings.index + 1, c*100, T, notional, y0*100, y1*100, value,
+                            r*100, r_jm*100, r_bm*100, error_jm, (r - r_bm)*100])
+
+
+def _count_rows(path):
+    with open(path, 'rb') as f:
+        lines = sum(block.count(b'\n') for block in iter(lambda: f.read(2**20), b''))
+        f.seek(-1, 2)
+        return lines + (f.read(1) != b'\n') - 1
+
+
+def process_holdings(name, dt=1, freq=1, chunk_rows=CHUNK_ROWS, progress=None):
+    """Per holding returns of an uploaded file, written next to it, and the portfolio summary.
+
+    Holdings with missing or non numeric values, or already matured, are
+    skipped. Returns a dict with the results file name, the number of
+    holdings and skipped rows, and the value weighted portfolio returns
+    (exact, JM and BM, in percent) with the largest holding errors.
+    """
+    if not isinstance(name, str) or not UPLOAD_NAME.fullmatch(name):
+        raise ValueError(f'not an uploaded file: {name!r}')
+    path = UPLOAD_DIR / f'{name}.csv'
+    header = pd.read_csv(path, nrows=0).columns.str.strip().str.lower()
+    missing = [col for col in HOLDING_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f'missing columns: {", ".join(missing)}')
+    total_rows = max(_count_rows(path), 1)
+
+    results = f'{name}-{dt:g}-{freq}'
+    tmp = UPLOAD_DIR / f'{results}.{uuid.uuid4().hex}.tmp'
+    rows = skipped = 0
+    value = 0.0
+    weighted = np.zeros(3)
+    max_error = np.zeros(2)
+    with open(tmp, 'wb') as out:
+        reader = pd.read_csv(path, chunksize=chunk_rows, skipinitialspace=True)
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip().str.lower()
+            chunk = chunk.loc[:, list(HOLDING_COLUMNS)].apply(pd.to_numeric, errors='coerce')
+            valid = chunk.notna().all(axis=1) & (chunk['maturity'] > 0)
+            skipped += int((~valid).sum())
+            X = holding_returns(chunk[valid], dt, freq)
+            out.write(X.tobytes())
+
+            rows += len(X)
+            value += X[:,_VALUE].sum()
+            weighted += X[:,_VALUE] @ X[:,_RETURNS]
+            max_error = np.fmax(max_error, np.fmax.reduce(np.abs(X[:,_ERRORS]), axis=0, initial=0))
+            if progress is not None:
+                progress(min((rows + skipped)/total_rows, 1), f'{rows + skipped:,} of {total_rows:,} holdings')
+    os.replace(tmp, UPLOAD_DIR / f'{results}.f8')
+
+    exact, jm, bm = weighted/value if value else (np.nan,)*3
+    return {'results': results, 'holdings': rows, 'skipped': skipped, 'value': value,
+            'exact': exact, 'jm': jm, 'bm': bm, 'error_jm': exact - jm, 'error_bm': exact - bm,
+            'max_error_jm': max_error[0], 'max_error_bm': max_error[1]}
+
+
+def load_results(results):
+    """Memory-mapped (rows, RESULT_COLUMNS) array of a processed holdings file."""
+    path = UPLOAD_DIR / f'{results}.f8'
+    if path.stat().st_size == 0:
+        return np.empty((0, len(RESULT_COLUMNS)))
+    return np.memmap(path, dtype=np.float64, mode='r').reshape(-1, len(RESULT_COLUMNS))
+
+
+def results_page(results, page, size, sort_by=None, descending=False):
+    """One page of results, optionally sorted by one of the RESULT_COLUMNS."""
+    X = load_results(results)
+    if sort_by is None:
+        index = np.arange(page*size, min((page + 1)*size, len(X)))
+    else:
+        col = RESULT_COLUMNS.index(sort_by)
+        order = order_cache.get_or_compute((results, col, descending),
+                                           lambda: np.argsort(-X[:,col] if descending else X[:,col], kind='stable'))
+        index = order[page*size:(page + 1)*size]
+    return np.asarray(X[index])
@@ -0,0 +1,40 @@
+import numpy as np
+
+from fixed_income.analytics import bond_analytics, bond_price, cash_received
+
+
+def return_jm_batch(T, c, y0, y1, dt=1, freq=1):
+    """Exact and Johansson's method returns for a batch of coupon bonds.
+
+    All arguments broadcast against each other (maturities T and horizons dt
+    in years, coupon rates c, start yields y0 and end yields y1). Returns the
+    tuple (r, r_jm, error) as float64 arrays, with the error in percentage
+    points as shown in the article.
+    """
+    P0, mod_dur0, convex0 = bond_analytics(c, y0, T, freq)
+
+    # calculate return, price after dt plus the cashflows received in the period
+    P1 = bond_price(c, y1, np.asarray(T) - dt, freq)
+    r = (P1 + cash_received(c, T, dt, freq))/P0 - 1
+
+    # calculate return using JM
+    dy = np.asarray(y1) - y0
+    theta0 = freq*np.log1p(np.asarray(y0)/freq)
+    rc0 = theta0*dt - mod_dur0*dy + 0.5*(convex0 - mod_dur0**2)*dy**2 \
+        + dy*dt/(1+np.asarray(y0)/freq)
+    r_jm = np.exp(rc0) - 1
+
+    return r, r_jm, (r-r_jm)*100
+
+
+def return_bm_batch(T, c, y0, y1, dt=1, freq=1):
+    """Basic method return, adapted to include the cashflows received in dt."""
+    P0, mod_dur0, convex0 = bond_analytics(c, y0, T, freq)
+    dy = np.asarray(y1) - y0
+    return -mod_dur0*dy + 0.5*convex0*dy**2 + cash_received(c, T, dt, freq)/P0
+
+
+def return_error_jm(T, c, y0, y1):
+    # the article's scalar function over a year; unlike the original loop,
+    # a bond maturing within the year includes its redemption
+    return float(return_jm_batch(T, c, y0, y1)[2])
@@ -0,0 +1,213 @@
+"""Monte Carlo accuracy of Johansson's and the basic method over random yield scenarios.
+
+    python -m fixed_income.simulation --paths 1000000 --model vasicek --workers 8
+
+Each path draws a horizon and an end yield (from a Vasicek short rate moving
+the curve in parallel, or from a plain parallel shock) and every bond of the
+coupon x maturity grid is priced on it. Paths are processed in chunks spread
+over a process pool; each chunk is reduced to per bond error histograms and
+moments right away, so memory does not grow with the number of paths.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from fixed_income.returns import return_bm_batch, return_jm_batch
+
+MODELS = ('vasicek', 'shock')
+METHODS = ('jm', 'bm')
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# histogram edges for the errors (percentage points), evenly spaced in asinh:
+# about 1% relative resolution from 1e-6 up to 30 points, plus under and
+# overflow bins
+_EDGE_SCALE, _EDGE_SPAN, _EDGE_BINS = 1e-6, 18, 3600
+ERROR_EDGES = np.sinh(np.linspace(-_EDGE_SPAN, _EDGE_SPAN, _EDGE_BINS + 1))*_EDGE_SCALE
+
+
+def _bins(e):
+    # same as np.searchsorted(ERROR_EDGES, e), without the binary search
+    x = (np.arcsinh(e/_EDGE_SCALE) + _EDGE_SPAN)*(_EDGE_BINS/(2*_EDGE_SPAN))
+    return np.clip(np.ceil(x), 0, _EDGE_BINS + 1).astype(np.intp)
+
+
+def end_yields(rng, n, y0, dt, model='vasicek', kappa=0.2, theta=0.04, sigma=0.01):
+    """End yields after horizons dt (years) for n paths starting at y0.
+
+    'vasicek' moves the yield with an Ornstein-Uhlenbeck short rate (exact
+    transition over dt), 'shock' adds a normal parallel shift of sigma per
+    square root year.
+    """
+    z = rng.standard_normal(n)
+    if model == 'vasicek':
+        decay = np.exp(-kappa*dt)
+        std = sigma*np.sqrt(-np.expm1(-2*kappa*dt)/(2*kappa)) if kappa > 0 else sigma*np.sqrt(dt)
+        return theta + (y0 - theta)*decay + std*z
+    if model == 'shock':
+        return y0 + sigma*np.sqrt(dt)*z
+    raise ValueError(f'unknown model {model!r}, expected one of {MODELS}')
+
+
+def _empty(n_bonds):
+    return {'count': 0,
+            'hist': {m: np.zeros((n_bonds, len(ERROR_EDGES) + 1), dtype=np.int64) for m in METHODS},
+            'mean': {m: np.zeros(n_bonds) for m in METHODS},
+            'm2': {m: np.zeros(n_bonds) for m in METHODS},
+            'min': {m: np.full(n_bonds, np.inf) for m in METHODS},
+            'max': {m: np.full(n_bonds, -np.inf) for m in METHODS}}
+
+
+def _merge(a, b):
+    # histograms add up, moments are merged as in Chan et al.
+    n = a['count'] + b['count']
+    for m in METHODS:
+        if n:
+            delta = b['mean'][m] - a['mean'][m]
+            a['m2'][m] = a['m2'][m] + b['m2'][m] + delta**2*a['count']*b['count']/n
+            a['mean'][m] = a['mean'][m] + delta*b['count']/n
+        a['hist'][m] += b['hist'][m]
+        a['min'][m] = np.minimum(a['min'][m], b['min'][m])
+        a['max'][m] = np.maximum(a['max'][m], b['max'][m])
+    a['count'] = n
+    return a
+
+
+def _run_chunk(seed, n, coupons, maturities, y0, horizon, freq, model, params):
+    rng = np.random.default_rng(seed)
+    dt = rng.uniform(*horizon, n)
+    y1 = end_yields(rng, n, y0, dt, model, **params)
+
+    c = np.asarray(coupons, dtype=np.float64)[None,:,None]
+    T = np.asarray(maturities, dtype=np.float64)[None,None,:]
+    dt, y1 = dt[:,None,None], y1[:,None,None]
+    r, r_jm, error_jm = return_jm_batch(T, c, y0, y1, dt, freq)
+    errors = {'jm': error_jm, 'bm': (r - return_bm_batch(T, c, y0, y1, dt, freq))*100}
+
+    n_bonds = c.size*T.size
+    offsets = np.arange(n_bonds)*(len(ERROR_EDGES) + 1)
+    result = _empty(n_bonds)
+    result['count'] = n
+    for m, e in errors.items():
+        e = e.reshape(n, n_bonds)
+        bins = _bins(e) + offsets
+        result['hist'][m] = np.bincount(bins.ravel(), minlength=offsets[-1] + len(ERROR_EDGES) + 1) \
+            .reshape(n_bonds, -1)
+        result['mean'][m] = e.mean(axis=0)
+        result['m2'][m] = ((e - result['mean'][m])**2).sum(axis=0)
+        result['min'][m] = e.min(axis=0)
+        result['max'][m] = e.max(axis=0)
+    return result
+
+
+def _quantiles(hist, lo, hi, levels):
+    # linear interpolation inside the histogram bins; the under and overflow
+    # bins are bounded by the smallest and largest error seen
+    n_bonds, n_bins = hist.shape
+    cum = np.cumsum(hist, axis=1)
+    out = np.empty((len(levels), n_bonds))
+    for j in range(n_bonds):
+        edges = np.concatenate([[lo[j]], np.clip(ERROR_EDGES, lo[j], hi[j]), [hi[j]]])
+        for i, q in enumerate(levels):
+            target = q*cum[j,-1]
+            b = min(np.searchsorted(cum[j], target), n_bins - 1)
+            below = cum[j,b-1] if b else 0
+            frac = (target - below)/hist[j,b] if hist[j,b] else 0
+            out[i,j] = edges[b] + frac*(edges[b+1] - edges[b])
+    return out
+
+
+def simulate(n_paths, coupons=(0, 0.02, 0.04, 0.08, 0.12), maturities=(2, 5, 10, 20, 30), y0=0.04,
+             horizon=(1/12, 1), model='vasicek', freq=1, kappa=0.2, theta=0.04, sigma=0.01,
+             chunk_size=None, workers=None, seed=0, quantiles=QUANTILES, progress=None):
+    """Error distributions of JM and BM returns by coupon and maturity.
+
+    Horizons are drawn uniformly (in years) from the horizon range, which must
+    end before the shortest maturity. Returns a dict with the histogram
+    'counts' per method over ERROR_EDGES, and 'mean', 'std', 'min', 'max'
+    (coupon, maturity) arrays and 'quantiles' (level, coupon, maturity) arrays
+    per method, all in percentage points. Results only depend on the seed and
+    chunk_size (up to rounding in the moments), not on the number of workers.
+    progress, when given, is called with the fraction of paths done and a
+    message after every chunk (see utils.jobs).
+    """
+    if model not in MODELS:
+        raise ValueError(f'unknown model {model!r}, expected one of {MODELS}')
+    if not 0 < horizon[0] <= horizon[1] < min(maturities):
+        raise ValueError('horizons must be positive and end before the shortest maturity')
+    shape = (len(coupons), len(maturities))
+    # about a million bond evaluations per chunk
+    chunk_size = chunk_size or max(1, 2**20//(shape[0]*shape[1]))
+    workers = workers or os.cpu_count()
+    args = (list(coupons), list(maturities), y0, horizon, freq, model,
+            {'kappa': kappa, 'theta': theta, 'sigma': sigma})
+    sizes = [chunk_size]*(n_paths//chunk_size) + ([n_paths % chunk_size] if n_paths % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    total = _empty(shape[0]*shape[1])
+    def merge(chunk):
+        _merge(total, chunk)
+        if progress is not None:
+            progress(total['count']/n_paths, f'{total["count"]:,} of {n_paths:,} paths')
+
+    if workers == 1:
+        for s, n in zip(seeds, sizes):
+            merge(_run_chunk(s, n, *args))
+    else:
+        # keep a couple of chunks per worker in flight so results are merged
+        # (and freed) as they come instead of piling up
+        with ProcessPoolExecutor(workers) as pool:
+            pending = set()
+            for s, n in zip(seeds, sizes):
+                if len(pending) >= 2*workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        merge(f.result())
+                pending.add(pool.submit(_run_chunk, s, n, *args))
+            for f in pending:
+                merge(f.result())
+
+    result = {'coupons': np.asarray(coupons), 'maturities': np.asarray(maturities), 'paths': total['count'],
+              'quantile_levels': np.asarray(quantiles), 'counts': total['hist']}
+    for key in ('mean', 'std', 'min', 'max', 'quantiles'):
+        result[key] = {}
+    for m in METHODS:
+        result['mean'][m] = total['mean'][m].reshape(shape)
+        result['std'][m] = np.sqrt(total['m2'][m]/max(total['count'] - 1, 1)).reshape(shape)
+        result['min'][m] = total['min'][m].reshape(shape)
+        result['max'][m] = total['max'][m].reshape(shape)
+        result['quantiles'][m] = _quantiles(total['hist'][m], total['min'][m], total['max'][m],
+                                            quantiles).reshape(len(quantiles), *shape)
+    return result
+
+
+def error_table(result, method='jm'):
+    """One row per (coupon, maturity) with the moments and quantiles of a method's error."""
+    index = pd.MultiIndex.from_product([result['coupons'], result['maturities']], names=['coupon', 'maturity'])
+    table = pd.DataFrame({key: result[key][method].ravel() for key in ('mean', 'std', 'min', 'max')}, index=index)
+    for q, values in zip(result['quantile_levels'], result['quantiles'][method]):
+        table[f'q{q:g}'] = values.ravel()
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', type=int, default=100_000)
+    parser.add_argument('--model', choices=MODELS, default='vasicek')
+    parser.add_argument('--y0', type=float, default=0.04)
+    parser.add_argument('--sigma', type=float, default=0.01)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = simulate(args.paths, y0=args.y0, model=args.model, sigma=args.sigma, workers=args.workers,
+                      seed=args.seed)
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.5f}'.format):
+        for method, title in (('jm', "Johansson's method"), ('bm', 'Basic method')):
+            print(f'{title} error (percentage points), {result["paths"]} paths\n{error_table(result, method)}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+from funds.analytics import DAYS_PER_YEAR, fund_performance, update_running_stats, running_summary
+from funds.store import DATASETS, Dataset, load_dataset, convert_all
+from funds.downsample import lttb_indices, downsample_frame
+from funds.panel import RESOLUTIONS, Panel, build_panel, load_panel
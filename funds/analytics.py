@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# calendar basis used for annualizing, matching the figures quoted on the site
+DAYS_PER_YEAR = 365
+
+
+def update_running_stats(stats, index, X):
+    """Fold new NAV rows into the running statistics of each manager in O(new rows).
+
+    stats is the dict returned by a previous call, or None to start from
+    scratch; index holds the dates of the rows of X (rows, managers), which
+    must come after every date already folded in. Every entry of the returned
+    dict is a per manager array.
+    """
+    index = np.asarray(index, dtype='datetime64[ns]')
+    X = np.asarray(X, dtype=np.float64)
+    n, k = X.shape
+    cols = np.arange(k)
+    if stats is None:
+        nan = np.full(k, np.nan)
+        nat = np.full(k, np.datetime64('NaT'), dtype='datetime64[ns]')
+        stats = {'first': nan, 'first_date': nat, 'last': nan, 'last_date': nat, 'last_row': nan,
+                 'count': np.zeros(k), 'mean': np.zeros(k), 'm2': np.zeros(k),
+                 'peak': nan, 'max_dd': nan, 'complete': ~np.isnan(X[0])}
+    stats = dict(stats)
+
+    valid = ~np.isnan(X)
+    has_data = valid.any(axis=0)
+    first_pos = np.argmax(valid, axis=0)
+    last_pos = n - 1 - np.argmax(valid[::-1], axis=0)
+    starts = np.isnan(stats['first']) & has_data
+    stats['first'] = np.where(starts, X[first_pos, cols], stats['first'])
+    stats['first_date'] = np.where(starts, index[first_pos], stats['first_date'])
+    stats['last'] = np.where(has_data, X[last_pos, cols], stats['last'])
+    stats['last_date'] = np.where(has_data, index[last_pos], stats['last_date'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # log returns, including the one from the previous last row, merged
+        # into the running mean and sum of squares (Chan et al.)
+        r = np.diff(np.log(np.vstack([stats['last_row'], X])), axis=0)
+        n_b = np.sum(~np.isnan(r), axis=0)
+        mean_b = np.where(n_b > 0, np.nansum(r, axis=0)/n_b, 0)
+        m2_b = np.nansum((r - mean_b)**2, axis=0)
+        n_a, mean_a = stats['count'], stats['mean']
+        total = n_a + n_b
+        delta = mean_b - mean_a
+        stats['mean'] = np.where(total > 0, mean_a + delta*n_b/total, 0)
+        stats['m2'] = stats['m2'] + m2_b + np.where(total > 0, delta**2*n_a*n_b/total, 0)
+        stats['count'] = total
+        stats['last_row'] = X[-1]
+
+        norm = X/stats['first']*100
+        peak = np.fmax.accumulate(np.vstack([stats['peak'], norm]), axis=0)[1:]
+        stats['max_dd'] = np.fmin(stats['max_dd'], np.fmin.reduce(norm/peak - 1, axis=0))
+        stats['peak'] = peak[-1]
+    return stats
+
+
+def running_summary(stats, columns):
+    """Summary table (one row per manager) from running statistics."""
+    years = (stats['last_date'] - stats['first_date'])/np.timedelta64(1, 'D')/DAYS_PER_YEAR
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = stats['last']/stats['first'] - 1
+        annual = np.where(years > 0, (1+total)**(1/years) - 1, np.nan)
+        vol = np.sqrt(stats['m2']/(stats['count'] - 1)*stats['count']/years)
+
+    # managers that start later than the others are measured over their own
+    # history but left out of the rankings
+    summary = pd.DataFrame({'Total return': total, 'Annualized return': annual, 'Volatility': vol,
+                            'Max drawdown': stats['max_dd']}, index=columns)
+    summary['Rank'] = summary['Total return'].where(stats['complete']).rank(ascending=False)
+    return summary
+
+
+def fund_performance(frame, window=365):
+    """Performance of every manager (column) of a NAV frame in one vectorized pass.
+
+    frame has a DatetimeIndex and one NAV column per manager; columns may hold
+    missing values or no data at all (their statistics are NaN). Returns a dict
+    with a 'summary' frame (one row per manager) and the time series
+    'normalized', 'rolling' (window day returns), 'drawdown' and 'rank'.
+    """
+    index = frame.index.values.astype('datetime64[ns]')
+    X = frame.to_numpy(dtype=np.float64)
+    stats = update_running_stats(None, index, X)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        norm = X/stats['first']*100
+        drawdown = norm/np.fmax.accumulate(norm, axis=0) - 1
+
+        # return over the last window days, once a full window is available
+        start = np.searchsorted(index, index - np.timedelta64(window, 'D'))
+        rolling = np.where((index - np.timedelta64(window, 'D') >= index[0])[:,None], X/X[start] - 1, np.nan)
+
+    columns = frame.columns
+    norm = pd.DataFrame(norm, index=frame.index, columns=columns)
+    return {
+        'summary': running_summary(stats, columns),
+        'normalized': norm,
+        'rolling': pd.DataFrame(rolling, index=frame.index, columns=columns),
+        'drawdown': pd.DataFrame(drawdown, index=frame.index, columns=columns),
+        'rank': norm.loc[:, stats['complete']].rank(axis=1, ascending=False).reindex(columns=columns),
+    }
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, Y, n_out):
+    """Largest-triangle-three-buckets selection for several series sharing x.
+
+    x has shape (n,) and Y shape (n, k). Returns an (n_out, k) array with the
+    row kept for each series in each bucket; the first and last rows are always
+    kept and all rows are kept when n <= n_out. NaN values are never preferred.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    n, k = Y.shape
+    if n <= n_out or n_out < 3:
+        return np.repeat(np.arange(n)[:,None], k, axis=1)
+
+    edges = np.linspace(1, n-1, n_out-1).astype(np.int64)
+    cols = np.arange(k)
+    idx = np.empty((n_out, k), dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n-1
+    a = idx[0]
+    for j in range(n_out-2):
+        lo, hi = edges[j], edges[j+1]
+        # the third vertex is the average point of the next bucket
+        if j+1 < n_out-2:
+            nxt = Y[edges[j+1]:edges[j+2]]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                avg_y = np.nansum(nxt, axis=0)/np.sum(~np.isnan(nxt), axis=0)
+            avg_x = x[edges[j+1]:edges[j+2]].mean()
+        else:
+            avg_y, avg_x = Y[-1], x[-1]
+        ax, ay = x[a], Y[a, cols]
+        area = np.abs((ax[None,:] - avg_x)*(Y[lo:hi] - ay) - (ax[None,:] - x[lo:hi,None])*(avg_y - ay))
+        # a NaN anchor (a manager starting late) or next average leaves the
+        # area undefined: any value then beats a NaN, the first one wins
+        area = np.where(np.isnan(Y[lo:hi]), -1, np.nan_to_num(area, nan=0))
+        a = lo + np.argmax(area, axis=0)
+        idx[j+1] = a
+    return idx
+
+
+def downsample_frame(frame, n_out):
+    """Long format (index, 'variable', 'value') frame with at most n_out points per column."""
+    x = frame.index.values.astype('datetime64[ns]').astype(np.int64)
+    Y = frame.to_numpy(dtype=np.float64)
+    idx = lttb_indices(x, Y, n_out)
+    rows = idx.T.ravel()
+    cols = np.repeat(np.arange(Y.shape[1]), idx.shape[0])
+    return pd.DataFrame({frame.index.name or 'index': frame.index.values[rows],
+                         'variable': np.asarray(frame.columns)[cols],
+                         'value': Y[rows, cols]})
@@ -0,0 +1,89 @@
+"""Append new dated NAV rows to a stored dataset.
+
+    python -m funds.ingest fundE new_rows.csv
+
+The rows file uses the same layout as the dataset's CSV. Only rows dated
+after the stored history are taken. They are kept in build/ingested, next to
+(not in) the CSV tracked under assets/data. Derived series and running
+statistics are updated from the new rows alone, and only the figures built
+from this dataset go stale (they are rebuilt by build.py or on their next
+request).
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from funds.analytics import update_running_stats
+from funds.store import DATASETS, STORE_DIR, load_dataset, source_files, _append, _save_meta, _save_stats, _source_stamp
+
+
+def _format_date(date, date_format):
+    if date_format == '%m/%d/%Y':
+        # the source files do not zero pad days and months
+        return f'{date.month}/{date.day}/{date.year}'
+    return date.strftime(date_format)
+
+
+def read_rows(name, path):
+    spec = DATASETS[name]
+    rows = pd.read_csv(path, index_col=spec['date_column'])
+    rows.index = pd.to_datetime(rows.index, format=spec['date_format'])
+    return rows
+
+
+def ingest(name, rows):
+    """Append the rows (DatetimeIndex, manager columns) newer than the stored history.
+
+    Managers missing from rows are stored as NaN. Returns the number of rows
+    appended.
+    """
+    spec = DATASETS[name]
+    if not spec.get('nav'):
+        raise ValueError(f'{name!r} is not a NAV dataset')
+    dataset = load_dataset(name)
+    unknown = set(rows.columns) - set(dataset.columns)
+    if unknown:
+        raise ValueError(f'unknown columns for {name!r}: {sorted(unknown)}')
+
+    rows = rows.reindex(columns=list(dataset.columns)).sort_index()
+    rows = rows[rows.index > pd.Timestamp(dataset.index[-1])]
+    rows = rows[~rows.index.duplicated(keep='last')]
+    if rows.empty:
+        return 0
+    index = rows.index.values.astype('datetime64[ns]')
+    X = rows.to_numpy(dtype=np.float64)
+    stats = update_running_stats(dataset.stats, index, X)
+
+    # the rows file goes first: if anything below fails, the stale meta makes
+    # the next load rebuild the store from the CSV and the rows file
+    _, ingested = source_files(name)
+    ingested.parent.mkdir(parents=True, exist_ok=True)
+    new = not ingested.exists()
+    with open(ingested, 'a', newline='') as f:
+        if new:
+            f.write(','.join([spec['date_column']] + list(dataset.columns)) + '\n')
+        for date, values in zip(rows.index, X):
+            f.write(','.join([_format_date(date, spec['date_format'])] 
+                             + ['' if np.isnan(v) else repr(float(v)) for v in values]) + '\n')
+
+    path = STORE_DIR / name
+    for i in range(X.shape[1]):
+        _append(path / f'col{i}.npy', X[:,i])
+        _append(path / f'norm{i}.npy', X[:,i]/stats['first'][i]*100)
+    _append(path / 'index.npy', index)
+    _save_stats(path, stats)
+    _save_meta(path, {'columns': list(dataset.columns), 'source': _source_stamp(name)})
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('dataset', choices=[n for n, spec in DATASETS.items() if spec.get('nav')])
+    parser.add_argument('rows', help='CSV file with the new rows')
+    args = parser.parse_args()
+    print(f'{ingest(args.dataset, read_rows(args.dataset, args.rows))} rows appended to {args.dataset}')
+
+
+if __name__ == '__main__':
+    main()
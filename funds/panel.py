@@ -0,0 +1,151 @@
+"""All NAV datasets on one business-day calendar, at daily, weekly and monthly resolution.
+
+The calendar runs Monday to Friday from the first to the last date of any
+fund. Each fund is aligned to it as of the business day (its last row on or
+before that day, so carried-forward weekend rows drop out) and is NaN outside
+its own dates. Weekly and monthly series keep the last business day of each
+period. Every resolution is stored as one (dates, fund x manager) array under
+build/panel and memory-mapped, so a query is a slice of it.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from funds.store import DATASETS, STORE_DIR, _save, _stamp, load_dataset
+
+PANEL_DIR = STORE_DIR.parent / 'panel'
+PANEL_VERSION = 1
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+
+_handle = None
+_lock = threading.Lock()
+
+
+def _funds():
+    return [name for name, spec in DATASETS.items() if spec.get('nav')]
+
+
+def panel_key():
+    h = hashlib.sha256(f'{PANEL_VERSION}'.encode())
+    for name in _funds():
+        h.update(name.encode())
+        h.update((STORE_DIR / name / 'meta.json').read_bytes())
+    return h.hexdigest()[:16]
+
+
+def business_days(start, end):
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    return days[np.is_busday(days)]
+
+
+def align(calendar, index, X):
+    """Rows of X (dated by index) as of each calendar day, NaN before the first and after the last date."""
+    days = np.asarray(index).astype('datetime64[D]')
+    pos = np.searchsorted(days, calendar, 'right') - 1
+    inside = (pos >= 0) & (calendar <= days[-1])
+    out = np.full((len(calendar), X.shape[1]), np.nan)
+    out[inside] = X[pos[inside]]
+    return out
+
+
+def period_ends(calendar, resolution):
+    """Positions of the last calendar day of each week or month."""
+    if resolution == 'daily':
+        return np.arange(len(calendar))
+    if resolution == 'weekly':
+        # 1970-01-01 was a Thursday, shift so weeks start on Monday
+        period = (calendar.astype(np.int64) + 3)//7
+    elif resolution == 'monthly':
+        period = calendar.astype('datetime64[M]').astype(np.int64)
+    else:
+        raise ValueError(f'unknown resolution {resolution!r}, expected one of {RESOLUTIONS}')
+    return np.flatnonzero(np.r_[period[1:] != period[:-1], True])
+
+
+def build_panel(force=False):
+    """Align the NAV datasets and write every resolution, unless they are up to date."""
+    datasets = [load_dataset(name) for name in _funds()]
+    path = PANEL_DIR / panel_key()
+    if (path / 'meta.json').exists() and not force:
+        return path
+
+    calendar = business_days(min(d.index[0] for d in datasets), max(d.index[-1] for d in datasets))
+    values = np.hstack([align(calendar, d.index, d.values()) for d in datasets])
+    norm = np.hstack([align(calendar, d.index, d.values(normalized=True)) for d in datasets])
+
+    path.mkdir(parents=True, exist_ok=True)
+    for resolution in RESOLUTIONS:
+        ends = period_ends(calendar, resolution)
+        _save(path / f'{resolution}_dates.npy', calendar[ends].astype('datetime64[ns]'))
+        _save(path / f'{resolution}.npy', np.ascontiguousarray(values[ends]))
+        _save(path / f'{resolution}_norm.npy', np.ascontiguousarray(norm[ends]))
+    tmp = path / f'meta.{os.getpid()}.tmp'
+    tmp.write_text(json.dumps({'funds': {d.name: list(d.columns) for d in datasets}}))
+    os.replace(tmp, path / 'meta.json')
+    for old in PANEL_DIR.iterdir():
+        if old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+class Panel:
+    """Read-only view of the aligned funds; columns are (fund, manager) pairs, fund by fund."""
+
+    def __init__(self, path, stamp):
+        self.stamp = stamp
+        self.funds = json.loads((path / 'meta.json').read_text())['funds']
+        self.columns = tuple((fund, manager) for fund, managers in self.funds.items() for manager in managers)
+        self._dates = {r: np.load(path / f'{r}_dates.npy', mmap_mode='r') for r in RESOLUTIONS}
+        self._values = {r: np.load(path / f'{r}.npy', mmap_mode='r') for r in RESOLUTIONS}
+        self._norm = {r: np.load(path / f'{r}_norm.npy', mmap_mode='r') for r in RESOLUTIONS}
+
+    def dates(self, resolution='daily'):
+        return self._dates[resolution]
+
+    def _columns(self, funds, managers):
+        if funds is None and managers is None:
+            return slice(None)
+        cols = [i for i, (fund, manager) in enumerate(self.columns)
+                if (funds is None or fund in funds) and (managers is None or manager in managers)]
+        # a single fund is a block of columns, kept as a view
+        if not cols:
+            return slice(0, 0)
+        if cols == list(range(cols[0], cols[-1] + 1)):
+            return slice(cols[0], cols[-1] + 1)
+        return cols
+
+    def window(self, start=None, end=None, resolution='daily', normalized=False, funds=None, managers=None):
+        """Dates and (dates, columns) values between two dates, both included.
+
+        Without a funds or managers selection (or with one fund) the values
+        are a view of the stored array, not a copy.
+        """
+        dates = self._dates[resolution]
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'ns'), 'left')
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'ns'), 'right')
+        values = (self._norm if normalized else self._values)[resolution]
+        return dates[lo:hi], values[lo:hi, self._columns(funds, managers)]
+
+    def frame(self, start=None, end=None, resolution='daily', normalized=False, funds=None, managers=None):
+        dates, values = self.window(start, end, resolution, normalized, funds, managers)
+        cols = self._columns(funds, managers)
+        columns = self.columns[cols] if isinstance(cols, slice) else [self.columns[i] for i in cols]
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='Date'),
+                            columns=pd.MultiIndex.from_tuples(columns, names=['Fund', 'Manager']))
+
+
+def load_panel():
+    """Cached handle for the aligned funds, rebuilt when any NAV dataset changes."""
+    global _handle
+    stamp = tuple(_stamp(name) for name in _funds())
+    if _handle is None or _handle.stamp != stamp:
+        with _lock:
+            if _handle is None or _handle.stamp != stamp:
+                path = build_panel()
+                _handle = Panel(path, tuple(_stamp(name) for name in _funds()))
+    return _handle
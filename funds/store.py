@@ -0,0 +1,192 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from funds.analytics import update_running_stats
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / 'assets' / 'data'
+STORE_DIR = ROOT / 'build' / 'store'
+# rows appended by funds.ingest, kept out of the tracked CSVs
+INGEST_DIR = ROOT / 'build' / 'ingested'
+
+STORE_VERSION = 2
+
+# source CSVs: file name, date column and its format (None lets pandas infer);
+# 'nav' datasets hold one NAV column per manager and accept daily appends
+DATASETS = {
+    'aum': {'file': 'aum.csv', 'date_column': 'dt', 'date_format': '%Y-%m-%d %H:%M:%S'},
+    'fundE': {'file': 'vcfE2018-2022_mod.csv', 'date_column': 'Fecha', 'date_format': '%m/%d/%Y', 'nav': True},
+    'fundC': {'file': 'vcfC2020-2021_mod.csv', 'date_column': 'Fecha', 'date_format': '%m/%d/%Y', 'nav': True},
+}
+
+_handles = {}
+_lock = threading.Lock()
+
+
+def source_files(name):
+    """The dataset's CSV in the repo and the file of rows ingested since, which may not exist yet."""
+    file = DATASETS[name]['file']
+    return DATA_DIR / file, INGEST_DIR / file
+
+
+def _source_stamp(name):
+    # sizes and modification times: a stale check without reading the history
+    h = hashlib.sha256(f'{STORE_VERSION}'.encode())
+    for path in source_files(name):
+        try:
+            stat = path.stat()
+            h.update(f'{path.name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        except FileNotFoundError:
+            h.update(f'{path.name}:-;'.encode())
+    return h.hexdigest()[:16]
+
+
+def _save(path, array):
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _append(path, array):
+    # grow a 1-d .npy file in place: data first, then the header with the new
+    # shape, so readers never see rows that are not written yet
+    with open(path, 'r+b') as f:
+        np.lib.format.read_magic(f)
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+        offset = f.tell()
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                      'fortran_order': False, 'shape': (shape[0] + len(array),)})
+        if header.tell() == offset:
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            f.flush()
+            f.seek(0)
+            f.write(header.getvalue())
+            return
+    # the header outgrew its padding, rewrite the whole file
+    _save(path, np.concatenate([np.load(path), np.asarray(array, dtype=dtype)]))
+
+
+def _save_stats(path, stats):
+    tmp = path / f'stats.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **stats)
+    os.replace(tmp, path / 'stats.npz')
+
+
+def _save_meta(path, meta):
+    tmp = path / f'meta.{os.getpid()}.tmp'
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, path / 'meta.json')
+
+
+def convert(name):
+    """Write a dataset as one .npy file per column plus a datetime64 index.
+
+    Each column also gets its series normalized to 100 at its first value, and
+    the running statistics of all columns are kept in stats.npz, so appends
+    only need to process the new rows.
+    """
+    spec = DATASETS[name]
+    source, ingested = source_files(name)
+    data = pd.read_csv(source)
+    if ingested.exists():
+        # rows the repo's CSV has caught up with are dropped
+        rows = pd.read_csv(ingested)
+        last = pd.to_datetime(data[spec['date_column']], format=spec['date_format']).max()
+        rows = rows[pd.to_datetime(rows[spec['date_column']], format=spec['date_format']) > last]
+        data = pd.concat([data, rows], ignore_index=True)
+    index = pd.to_datetime(data.pop(spec['date_column']), format=spec['date_format'])
+    data = data.loc[:, [c for c in data.columns if not c.startswith('Unnamed')]]
+    index = index.to_numpy(dtype='datetime64[ns]')
+    X = data.to_numpy(dtype=np.float64)
+    stats = update_running_stats(None, index, X)
+
+    path = STORE_DIR / name
+    path.mkdir(parents=True, exist_ok=True)
+    _save(path / 'index.npy', index)
+    for i in range(X.shape[1]):
+        _save(path / f'col{i}.npy', X[:,i])
+        _save(path / f'norm{i}.npy', X[:,i]/stats['first'][i]*100)
+    _save_stats(path, stats)
+    # meta goes last: a store is only valid once its meta matches the source
+    _save_meta(path, {'columns': list(data.columns), 'source': _source_stamp(name)})
+    return path
+
+
+def convert_all():
+    return {name: convert(name) for name in DATASETS if not _is_current(name)}
+
+
+def _is_current(name):
+    meta = STORE_DIR / name / 'meta.json'
+    return meta.exists() and json.loads(meta.read_text())['source'] == _source_stamp(name)
+
+
+def _stamp(name):
+    try:
+        return (STORE_DIR / name / 'meta.json').stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class Dataset:
+    """Read-only view of a stored dataset; arrays are memory-mapped and shared across workers."""
+
+    def __init__(self, name):
+        path = STORE_DIR / name
+        self.name = name
+        self.stamp = _stamp(name)
+        self.columns = tuple(json.loads((path / 'meta.json').read_text())['columns'])
+        self.index = np.load(path / 'index.npy', mmap_mode='r')
+        # a concurrent append may have grown the columns past the index
+        n = len(self.index)
+        self._values = [np.load(path / f'col{i}.npy', mmap_mode='r')[:n] for i in range(len(self.columns))]
+        self._norm = [np.load(path / f'norm{i}.npy', mmap_mode='r')[:n] for i in range(len(self.columns))]
+        with np.load(path / 'stats.npz') as stats:
+            self.stats = {k: stats[k] for k in stats.files}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, column):
+        return self._values[self.columns.index(column)]
+
+    def window(self, start=None, end=None, normalized=False):
+        """Index and (rows, columns) values between two dates, both included."""
+        lo = 0 if start is None else np.searchsorted(self.index, np.datetime64(start, 'ns'), 'left')
+        hi = len(self.index) if end is None else np.searchsorted(self.index, np.datetime64(end, 'ns'), 'right')
+        values = self._norm if normalized else self._values
+        return self.index[lo:hi], np.column_stack([v[lo:hi] for v in values])
+
+    def values(self, normalized=False):
+        """All columns as a (rows, columns) float64 array, optionally normalized to 100."""
+        return np.column_stack(self._norm if normalized else self._values)
+
+    def frame(self, normalized=False):
+        return pd.DataFrame(self.values(normalized), index=pd.DatetimeIndex(self.index, name='Date'),
+                            columns=list(self.columns))
+
+
+def load_dataset(name):
+    """Cached handle for a dataset, converting it first if the store is missing or stale.
+
+    The handle is reopened when the store changes underneath it (see
+    funds.ingest), which costs one stat call per lookup.
+    """
+    handle = _handles.get(name)
+    if handle is None or handle.stamp != _stamp(name):
+        with _lock:
+            if not _is_current(name):
+                convert(name)
+            handle = _handles[name] = Dataset(name)
+    return handle
@@ -0,0 +1,93 @@
+"""Production settings, read by gunicorn from the working directory.
+
+Workers and threads follow the cores available to the process and can be
+overridden with WEB_CONCURRENCY and GUNICORN_THREADS; JOB_WORKERS sets the
+number of background job workers started next to them.
+"""
+import os
+import time
+
+BOOT = time.monotonic()
+
+
+def _cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# every worker is a process: keep numpy to one thread each
+for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, '1')
+
+wsgi_app = 'wsgi:server'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+# requests are mostly numpy and JSON work, which holds the GIL: one process
+# per core, and a few threads each for the polling and static requests
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, _cores())))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+job_workers = int(os.environ.get('JOB_WORKERS', 1))
+
+
+def _memory():
+    # MB of resident memory, and how much of it is private to this process
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])/1024
+    return fields['Rss'], fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), fields['Pss']
+
+
+def on_starting(server):
+    from utils import metrics
+    metrics.clear()
+
+
+def when_ready(server):
+    import wsgi
+    from utils import jobs
+    if job_workers:
+        jobs.start_workers(job_workers)
+    rss, _, _ = _memory()
+    server.log.info('app preloaded in %.2fs (warm-up %.2fs), master rss %.0f MB; %d workers x %d threads, %d job workers',
+                    time.monotonic() - BOOT, wsgi.ready_seconds, rss, server.cfg.workers, server.cfg.threads, job_workers)
+
+
+def pre_fork(server, worker):
+    worker.fork_time = time.monotonic()
+
+
+def post_fork(server, worker):
+    from utils import metrics
+    metrics.reset()
+
+
+def post_worker_init(worker):
+    try:
+        rss, private, pss = _memory()
+    except (OSError, KeyError):
+        worker.log.info('worker %d ready in %.2fs', worker.pid, time.monotonic() - worker.fork_time)
+        return
+    worker.log.info('worker %d ready in %.2fs: rss %.0f MB, private %.0f MB, proportional %.0f MB',
+                    worker.pid, time.monotonic() - worker.fork_time, rss, private, pss)
+
+
+def worker_exit(server, worker):
+    # the worker's series move to the retired totals, /metrics keeps them
+    from utils import metrics
+    metrics.discard()
+
+
+def on_reload(server):
+    # runs in the master before the new workers are forked from it
+    import wsgi
+    seconds = wsgi.prepare()
+    server.log.info('data and artifacts reloaded in %.2fs', seconds)
@@ -3,7 +3,7 @@ from dash import dcc, html, callback, Output, Input
 import dash_bootstrap_components as dbc
 
 
-dash.register_page(__name__, name='Acknowledgments')
+dash.register_page(__name__, name='Acknowledgments', order=3, cache=True)
 
 layout = html.Div(
     [
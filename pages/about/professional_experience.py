@@ -1,14 +1,23 @@
 import dash
-from dash import dcc, html, callback, Output, Input
+from dash import dcc, html, callback, Output, Input, ClientsideFunction, dash_table
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import dash_bootstrap_components as dbc
+import numpy as np
 import pandas as pd
 
+from funds import load_dataset, load_panel, downsample_frame, lttb_indices, fund_performance, running_summary
+from utils.artifacts import register_figure, load_figure
+from utils.assets import asset_url
+from utils.figures import encode_figure
 
-dash.register_page(__name__, name='Professional Experience')
+
+# cached until new fund data changes the figures
+dash.register_page(__name__, name='Professional Experience', order=1, cache=True,
+                   figures=['aum', 'fundE', 'fundC', 'fundE_rank', 'fundC_rank'])
 
 def generate_graph_aum():
-    data = pd.read_csv('assets/data/aum.csv', index_col=0)
+    data = load_dataset('aum').frame().reset_index()
     data.iloc[:,1] = data.iloc[:,1]/1000
     data.columns = ['Date', 'AUM (US$ Bn)']
     fig = px.line(data, x="Date", y="AUM (US$ Bn)", 
@@ -36,99 +45,222 @@ def generate_graph_aum():
     
     return fig
 
-def generate_graph_fundE():
-    data = pd.read_csv('assets/data/vcfE2018-2022_mod.csv', index_col=0)
-    norm = (data.iloc[:,0:6]).divide(data.iloc[0,0:6])*100
-    norm.index = pd.to_datetime(norm.index, format='%m/%d/%Y')
-    norm.index.names = ['Date']
-    fig = px.line(norm, x=norm.index, y=norm.columns, 
+# points per manager sent to the browser, whatever the length of the history
+POINT_BUDGET = 500
+
+def fund_frame(name, n_managers, normalized=False):
+    # the fund's managers on the business-day calendar of the panel, over
+    # the fund's own dates
+    frame = load_panel().frame(normalized=normalized, funds=[name]).droplevel('Fund', axis=1)
+    return frame.iloc[:,0:n_managers].dropna(how='all').rename_axis(columns=None)
+
+def generate_graph_fund(name, n_managers, title):
+    norm = fund_frame(name, n_managers, normalized=True)
+    fig = px.line(downsample_frame(norm, POINT_BUDGET), x='Date', y='value', color='variable',
                   labels={
                      "Date": "Date",
                      "value": "Return",
                      "variable": "Manager"
                   },
-                  title='Fund E total return by manager (5Y)',
+                  title=title,
                   template='plotly_dark')
-    for i in range(1,6):
+    for i in range(1,n_managers):
         fig['data'][i]['line']['width']=0.5
     fig.data = fig.data[::-1] # reorder to have Capital on top
     fig = fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(22,26,29, 1)"})
 
     return fig
 
+def generate_graph_fundE():
+    return generate_graph_fund('fundE', 6, 'Fund E total return by manager (5Y)')
+
 def generate_graph_fundC():
-    data = pd.read_csv('assets/data/vcfC2020-2021_mod.csv', index_col=0)
-    norm = (data.iloc[:,0:7]).divide(data.iloc[0,0:7])*100
-    norm.index = pd.to_datetime(norm.index, format='%m/%d/%Y')
-    norm.index.names = ['Date']
-    fig = px.line(norm, x=norm.index, y=norm.columns, 
+    return generate_graph_fund('fundC', 7, 'Fund C total return by manager (2Y)')
+
+def performance_fund(name, n_managers):
+    return fund_performance(fund_frame(name, n_managers))
+
+def summary_fund(name, n_managers):
+    # from the running statistics kept in the store, so it is never stale
+    dataset = load_dataset(name)
+    stats = {k: v[0:n_managers] for k, v in dataset.stats.items()}
+    return running_summary(stats, list(dataset.columns[0:n_managers]))
+
+def generate_graph_rank(name, n_managers, title):
+    rank = performance_fund(name, n_managers)['rank'].dropna(axis=1, how='all')
+    # a step chart only needs the days a manager's rank changes (and the last one)
+    changed = rank.ne(rank.shift())
+    changed.iloc[-1] = True
+    steps = rank.where(changed).reset_index().melt(id_vars='Date').dropna()
+    fig = px.line(steps, x='Date', y='value', color='variable', line_shape='hv',
                   labels={
                      "Date": "Date",
-                     "value": "Return",
+                     "value": "Rank",
                      "variable": "Manager"
                   },
-                  title='Fund C total return by manager (2Y)',
+                  title=title,
                   template='plotly_dark')
-    for i in range(1,7):
-        fig['data'][i]['line']['width']=0.5
-    fig.data = fig.data[::-1] # reorder to have Capital on top
+    fig.update_yaxes(autorange='reversed', dtick=1)
     fig = fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(22,26,29, 1)"})
-    
+
     return fig
 
-layout = html.Div(
-    [
-     html.Div("About > Professional Experience", style={"font-style":"italic", "padding-bottom":'15px'}),
-     html.H3("Updated Information", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
-     html.Div("To review my most updated credentials please:"),
-     html.Li(
-             [
-                 html.Div("Visit my ", style={"display": "inline",}), 
-                 dcc.Link("LinkedIn Profile", href="https://www.linkedin.com/in/juanamora/", target="_blank"),     
-             ], style={'margin-top':'10px'}),
-     html.Li(
-             [
-                 html.Div("Download my ", style={"display": "inline"}), 
-                 dcc.Link("Resume", href=dash.get_asset_url("MFE23-JAMora.pdf"), target="_blank"),    
-             ]),
-     html.Div("In the following sections I will provide more details about particular aspects of my professional experience.",
-              style={ "padding-top":'10px'}),
+def generate_graph_rankE():
+    return generate_graph_rank('fundE', 6, 'Fund E ranking by total return')
+
+def generate_graph_rankC():
+    return generate_graph_rank('fundC', 7, 'Fund C ranking by total return')
+
+def generate_table_fund(name, n_managers):
+    summary = summary_fund(name, n_managers).dropna(how='all')
+    pct = ['Total return', 'Annualized return', 'Volatility', 'Max drawdown']
+    return dash_table.DataTable(
+        columns=[{"name": "Manager", "id": "Manager"}] + [{"name": c, "id": c} for c in pct + ['Rank']],
+        data=[
+            {"Manager": manager, **{c: f'{row[c]:.2%}' for c in pct}, 
+             "Rank": '-' if pd.isna(row['Rank']) else f"{row['Rank']:.0f}"}
+            for manager, row in summary.iterrows()
+        ],
+        style_header={
+            'backgroundColor': 'rgb(30, 30, 30)',
+            'color': 'white',
+            'textAlign':'center',
+        },
+        style_data={
+            'backgroundColor': 'rgb(50, 50, 50)',
+            'color': 'white'
+        },
+        style_table={'margin-left':'30px', 'margin-right':'30px', 'width':'auto'},
+    )
+
+def zoom_graph_fund(name, n_managers, x_range):
+    # full view figure with its traces replaced by the zoomed window at full
+    # resolution (or downsampled again if the window is still too long)
+    panel = load_panel()
+    columns = panel.funds[name][0:n_managers]
+    index, norm = panel.window(*(pd.Timestamp(x) for x in x_range), normalized=True, funds=[name])
+    rows = np.flatnonzero(~np.isnan(norm[:,0:n_managers]).all(axis=1))
+    if not len(rows):
+        raise PreventUpdate
+    index, norm = index[rows[0]:rows[-1]+1], norm[rows[0]:rows[-1]+1, 0:n_managers]
+    idx = lttb_indices(index.astype(np.int64), norm, POINT_BUDGET)
+
+    fig = load_figure(name)
+    data = []
+    for trace in fig['data']:
+        j = columns.index(trace['name'])
+        data.append({**trace, 'x': index[idx[:,j]], 'y': norm[idx[:,j],j]})
+    xaxis = {**fig['layout']['xaxis'], 'range': list(x_range), 'autorange': False}
+    return {**fig, 'data': data, 'layout': {**fig['layout'], 'xaxis': xaxis}}
+
+def relayout_range(relayout):
+    # x range of a zoom event, None when the chart went back to the full view
+    if 'xaxis.range[0]' in relayout:
+        return relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    if 'xaxis.range' in relayout:
+        return tuple(relayout['xaxis.range'])
+    if relayout.get('xaxis.autorange'):
+        return None
+    raise PreventUpdate
+
+register_figure('aum', generate_graph_aum, inputs=['assets/data/aum.csv', 'funds/store.py'])
+register_figure('fundE', generate_graph_fundE, inputs=['assets/data/vcfE2018-2022_mod.csv', 'build/ingested/vcfE2018-2022_mod.csv', 'funds/store.py', 'funds/panel.py', 'funds/downsample.py', 'funds/analytics.py'])
+register_figure('fundC', generate_graph_fundC, inputs=['assets/data/vcfC2020-2021_mod.csv', 'build/ingested/vcfC2020-2021_mod.csv', 'funds/store.py', 'funds/panel.py', 'funds/downsample.py', 'funds/analytics.py'])
+register_figure('fundE_rank', generate_graph_rankE, inputs=['assets/data/vcfE2018-2022_mod.csv', 'build/ingested/vcfE2018-2022_mod.csv', 'funds/store.py', 'funds/panel.py', 'funds/downsample.py', 'funds/analytics.py'])
+register_figure('fundC_rank', generate_graph_rankC, inputs=['assets/data/vcfC2020-2021_mod.csv', 'build/ingested/vcfC2020-2021_mod.csv', 'funds/store.py', 'funds/panel.py', 'funds/downsample.py', 'funds/analytics.py'])
+
+GRAPHS = {'graph-aum': 'aum', 'graph-fundE': 'fundE', 'graph-fundE-rank': 'fundE_rank',
+          'graph-fundC': 'fundC', 'graph-fundC-rank': 'fundC_rank'}
+
+def encoded_graph(graph_id):
+    # the figure data goes to the browser as binary arrays and is decoded there
+    return html.Div([dcc.Store(id=graph_id + '-data', data=encode_figure(load_figure(GRAPHS[graph_id]))),
+                     dcc.Graph(id=graph_id, style={'margin':'30px'})])
+
+for graph_id in GRAPHS:
+    dash.clientside_callback(ClientsideFunction('figures', 'decode'),
+                             Output(graph_id, 'figure'), Input(graph_id + '-data', 'data'))
+
+def layout(**kwargs):
+    fundE = summary_fund('fundE', 6)
+    fundC = summary_fund('fundC', 7)
+    return html.Div(
+        [
+         html.Div("About > Professional Experience", style={"font-style":"italic", "padding-bottom":'15px'}),
+         html.H3("Updated Information", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
+         html.Div("To review my most updated credentials please:"),
+         html.Li(
+                 [
+                     html.Div("Visit my ", style={"display": "inline",}), 
+                     dcc.Link("LinkedIn Profile", href="https://www.linkedin.com/in/juanamora/", target="_blank"),     
+                 ], style={'margin-top':'10px'}),
+         html.Li(
+                 [
+                     html.Div("Download my ", style={"display": "inline"}), 
+                     dcc.Link("Resume", href=asset_url("MFE23-JAMora.pdf"), target="_blank"),    
+                 ]),
+         html.Div("In the following sections I will provide more details about particular aspects of my professional experience.",
+                  style={ "padding-top":'10px'}),
      
-     html.H3("AFP Capital", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
-     html.Div("""I worked for approximately 5 years in AFP Capital, a chilean pension fund manager.
-              If you are not familiar with the chilean pension system, I provide some brief
-              context in the following note."""),
-     html.Blockquote(
-         [
-             html.Div("The chilean pension system:", style={'font-weight':'bold'}),
-             dcc.Markdown('''
-                          * Chilean pension funds are based on individual capitalization and a fixed contribution.
-                          * Each individual chooses among several privately owned pension fund managers to invest their retirement savings.
-                          * Pension fund managers therefore compete to maximize investment returns under a defined risk framework.
-                          * Each pension fund manager has 5 different funds to choose from. They are named A to E (ordered in increasing level of risk).'''), 
-         ]
-         , className='blockNote'),
-     html.Div("""I was in charge of local sovereign bonds and IRS strategies and trading in AFP Capital.
-              I was also responsible for the cash management for all funds. Due to the funds' asset composition, 
-              I was more involved in fund E's strategy (most conservative, higher percentage of local sovereign bonds),
-              and fund C (balanced fund) of which I was co-portfolio manager during 2020-2021. 
-              The AUM under my supervision varied between approximately US$ 10bn and US$ 6bn as shown in the following graph."""),     
-     dcc.Graph(id='graph-aum', figure=generate_graph_aum(), style={'margin':'30px'}),
-     html.Div("""In the previous graph you can see the amount of local bonds had a high variation. This is explained by several factors:"""),
-     html.Li("During 2019 the macroeconomic outlook was positive, which triggered a decrease in these 'safe' assets.", style={'list-style-position':'outside'}),
-     html.Li("To fight the effects of COVID, clients were allowed to partially redeem their funds. The liquidity of local bonds and the Central Bank's repurchase program made them good candidates to finance the redemptions.", style={'list-style-position':'outside'}),
-     html.Div("""AFP Capital Fund E was the best performer during the overall 2018-2022 (5 year) period. 
-              In the following graph you can see the fund's performance normalized to the first day of 2018. 
-              The fund's nominal return was 45.98% during this period, or an annual return of 7.86% 
-              (feel free to zoom in using the plotly tools).""", style={'margin-top':'15px'}),
-     dcc.Graph(id='graph-fundE', figure=generate_graph_fundE(), style={'margin':'30px'}),
-     html.Div("""During my period as co-portfolio manager of AFP Capital's fund C our total return was 12.54%, or 
-              6.09% annual. This placed us second only to Habitat, that returned 6.16% annualy, and far above
-              any other managers."""),
-     dcc.Graph(id='graph-fundC', figure=generate_graph_fundC(), style={'margin':'30px'}),
-     html.Div("""On the whole, the funds I had most impact had superior returns compared to the rest of the managers.
-              This achievements were supported by continous innovation and a great team."""),
-    ],
-    className='content',
+         html.H3("AFP Capital", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
+         html.Div("""I worked for approximately 5 years in AFP Capital, a chilean pension fund manager.
+                  If you are not familiar with the chilean pension system, I provide some brief
+                  context in the following note."""),
+         html.Blockquote(
+             [
+                 html.Div("The chilean pension system:", style={'font-weight':'bold'}),
+                 dcc.Markdown('''
+                              * Chilean pension funds are based on individual capitalization and a fixed contribution.
+                              * Each individual chooses among several privately owned pension fund managers to invest their retirement savings.
+                              * Pension fund managers therefore compete to maximize investment returns under a defined risk framework.
+                              * Each pension fund manager has 5 different funds to choose from. They are named A to E (ordered in increasing level of risk).'''), 
+             ]
+             , className='blockNote'),
+         html.Div("""I was in charge of local sovereign bonds and IRS strategies and trading in AFP Capital.
+                  I was also responsible for the cash management for all funds. Due to the funds' asset composition, 
+                  I was more involved in fund E's strategy (most conservative, higher percentage of local sovereign bonds),
+                  and fund C (balanced fund) of which I was co-portfolio manager during 2020-2021. 
+                  The AUM under my supervision varied between approximately US$ 10bn and US$ 6bn as shown in the following graph."""),     
+         encoded_graph('graph-aum'),
+         html.Div("""In the previous graph you can see the amount of local bonds had a high variation. This is explained by several factors:"""),
+         html.Li("During 2019 the macroeconomic outlook was positive, which triggered a decrease in these 'safe' assets.", style={'list-style-position':'outside'}),
+         html.Li("To fight the effects of COVID, clients were allowed to partially redeem their funds. The liquidity of local bonds and the Central Bank's repurchase program made them good candidates to finance the redemptions.", style={'list-style-position':'outside'}),
+         html.Div("""AFP Capital Fund E was the best performer during the overall 2018-2022 (5 year) period. 
+                  In the following graph you can see the fund's performance normalized to the first day of 2018. 
+                  The fund's nominal return was {:.2%} during this period, or an annual return of {:.2%} 
+                  (feel free to zoom in using the plotly tools).""".format(fundE.loc['CAPITAL', 'Total return'], 
+                                                                          fundE.loc['CAPITAL', 'Annualized return']), 
+                  style={'margin-top':'15px'}),
+         encoded_graph('graph-fundE'),
+         generate_table_fund('fundE', 6),
+         encoded_graph('graph-fundE-rank'),
+         html.Div("""During my period as co-portfolio manager of AFP Capital's fund C our total return was {:.2%}, or 
+                  {:.2%} annual. This placed us second only to Habitat, that returned {:.2%} annualy, and far above
+                  any other managers.""".format(fundC.loc['CAPITAL', 'Total return'], fundC.loc['CAPITAL', 'Annualized return'],
+                                                fundC.loc['HABITAT', 'Annualized return'])),
+         encoded_graph('graph-fundC'),
+         generate_table_fund('fundC', 7),
+         encoded_graph('graph-fundC-rank'),
+         html.Div("""On the whole, the funds I had most impact had superior returns compared to the rest of the managers.
+                  This achievements were supported by continous innovation and a great team."""),
+        ],
+        className='content',
+    )
+
+@callback(
+    Output('graph-fundE-data', 'data'),
+    Input('graph-fundE', 'relayoutData'),
+    prevent_initial_call=True,
+)
+def zoom_graph_fundE(relayout):
+    x_range = relayout_range(relayout or {})
+    return encode_figure(load_figure('fundE') if x_range is None else zoom_graph_fund('fundE', 6, x_range))
+
+@callback(
+    Output('graph-fundC-data', 'data'),
+    Input('graph-fundC', 'relayoutData'),
+    prevent_initial_call=True,
 )
-              
\ No newline at end of file
+def zoom_graph_fundC(relayout):
+    x_range = relayout_range(relayout or {})
+    return encode_figure(load_figure('fundC') if x_range is None else zoom_graph_fund('fundC', 7, x_range))
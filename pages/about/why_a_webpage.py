@@ -3,7 +3,7 @@ from dash import dcc, html, callback, Output, Input
 import dash_bootstrap_components as dbc
 
 
-dash.register_page(__name__, name='Why a webpage?')
+dash.register_page(__name__, name='Why a webpage?', order=2, cache=True)
 
 layout = html.Div(
     [
@@ -0,0 +1,86 @@
+import dash
+from dash import dcc, html, callback, Output, Input
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+import numpy as np
+
+from fixed_income import return_jm_batch
+from utils.cache import LRUCache
+from utils.controls import choice, slider_row, snap
+
+dash.register_page(__name__, name='JM Error Explorer', order=5)
+
+# figures of computed error surfaces, bounded per worker
+surface_cache = LRUCache('jm_error_surface', max_bytes=64*1024**2)
+
+DY_RANGE = np.arange(-600, 601)/10000
+MATURITY = {'min': 1, 'max': 30, 'step': 1}
+YIELD = {'min': 0, 'max': 10, 'step': 0.25}
+HORIZON = {'min': 1, 'max': 12, 'step': 1}
+COUPONS = {'min': 0, 'max': 20, 'step': 0.5}
+N_COUPONS = {'min': 2, 'max': 9, 'step': 1}
+FREQUENCIES = {1: 'Annual', 2: 'Semiannual', 4: 'Quarterly'}
+
+def error_surface(T, y0, months, c_min, c_max, n_coupons, freq):
+    c_range = np.linspace(c_min, c_max, n_coupons)/100
+    _, _, error = return_jm_batch(T, c_range[None,:], y0/100, y0/100 + DY_RANGE[:,None], 
+                                  dt=months/12, freq=freq)
+    return c_range, error
+
+def generate_graph_explorer(c_range, error):
+    fig = go.Figure(layout={'template':'plotly_dark'})
+    for i, c_i in enumerate(c_range):
+        fig.add_trace(go.Scatter(x=DY_RANGE*100, y=error[:,i], mode='lines', name=f'{c_i*100:.2f}'))
+    fig.update_layout(title='Johansson\'s Method Approximation Error',
+                      xaxis_title='d(yield) (%)', yaxis_title='Approx Error (%)', legend_title='Coupon')
+    fig = fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(22,26,29, 1)"})
+    
+    return fig
+
+layout = html.Div(
+    [
+     html.Div("Fixed Income > JM Error Explorer", style={"font-style":"italic", "padding-bottom":'15px'}),
+     html.H3("Johansson's method error explorer", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
+     dcc.Markdown('''The [discussion on bond returns](/fixed-income/discussion-br) shows the approximation error for a 
+                  single case: a 5 year bond, a 4% initial yield, a one year horizon and five coupon levels.
+                  Here you can change these parameters and see how the error of Johansson's method moves.'''),
+     slider_row("Maturity (years)", 
+                dcc.Slider(id='explorer-maturity', **MATURITY, value=5,
+                           marks={i: str(i) for i in [1, 5, 10, 15, 20, 25, 30]})),
+     slider_row("Starting yield (%)", 
+                dcc.Slider(id='explorer-yield', **YIELD, value=4,
+                           marks={i: str(i) for i in range(0, 11, 2)})),
+     slider_row("Horizon (months)", 
+                dcc.Slider(id='explorer-horizon', **HORIZON, value=12,
+                           marks={i: str(i) for i in [1, 3, 6, 9, 12]})),
+     slider_row("Coupon range (%)", 
+                dcc.RangeSlider(id='explorer-coupons', **COUPONS, value=[0, 20],
+                                marks={i: str(i) for i in range(0, 21, 5)})),
+     slider_row("Number of coupons", 
+                dcc.Slider(id='explorer-n-coupons', **N_COUPONS, value=5)),
+     slider_row("Coupon frequency", 
+                dcc.RadioItems(id='explorer-freq', value=1, inline=True, inputStyle={'margin-right':'5px', 'margin-left':'15px'},
+                               options=[{'label':label, 'value':freq} for freq, label in FREQUENCIES.items()])),
+     dcc.Graph(id='graph-explorer', style={'margin':'30px'}),
+    ],
+    className='content',
+)
+
+@callback(
+    Output('graph-explorer', 'figure'),
+    Input('explorer-maturity', 'value'),
+    Input('explorer-yield', 'value'),
+    Input('explorer-horizon', 'value'),
+    Input('explorer-coupons', 'value'),
+    Input('explorer-n-coupons', 'value'),
+    Input('explorer-freq', 'value'),
+)
+def update_graph_explorer(T, y0, months, coupons, n_coupons, freq):
+    # the values are snapped to what the controls can send, which bounds both
+    # the size of a surface and the number of distinct keys
+    if not isinstance(coupons, list) or len(coupons) != 2:
+        raise PreventUpdate
+    c_min, c_max = sorted(snap(c, **COUPONS) for c in coupons)
+    key = (int(snap(T, **MATURITY)), snap(y0, **YIELD), int(snap(months, **HORIZON)), c_min, c_max,
+           int(snap(n_coupons, **N_COUPONS)), choice(freq, FREQUENCIES))
+    return surface_cache.get_or_compute(key, lambda: generate_graph_explorer(*error_surface(*key)).to_dict())
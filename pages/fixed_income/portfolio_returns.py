@@ -0,0 +1,160 @@
+import dash
+from dash import dcc, html, callback, Output, Input, dash_table
+import dash_bootstrap_components as dbc
+
+from fixed_income.portfolio import HOLDING_COLUMNS, RESULT_COLUMNS, UPLOAD_NAME, process_holdings, results_page, save_holdings
+from utils import jobs
+from utils.controls import choice, slider_row, snap
+
+dash.register_page(__name__, name='Portfolio Returns', order=7)
+
+PAGE_SIZE = 20
+HORIZON = {'min': 1, 'max': 12, 'step': 1}
+FREQUENCIES = {1: 'Annual', 2: 'Semiannual', 4: 'Quarterly'}
+
+COLUMN_NAMES = {
+    'row': 'Row', 'coupon': 'Coupon (%)', 'maturity': 'Maturity', 'notional': 'Notional',
+    'start_yield': 'Start yield (%)', 'end_yield': 'End yield (%)', 'value': 'Value',
+    'exact': 'Exact (%)', 'jm': 'Johansson\'s (%)', 'bm': 'Basic (%)',
+    'error_jm': 'JM error (%)', 'error_bm': 'BM error (%)',
+}
+
+def summary_card(title, value):
+    return dbc.Col(html.Div([html.Div(title, style={'color':'rgb(151,160,175,1)'}), html.H4(value)]))
+
+def generate_summary(summary):
+    return [
+        html.Div(f"{summary['holdings']:,} holdings"
+                 + (f", {summary['skipped']:,} rows skipped (missing values or matured bonds)" if summary['skipped'] else ''),
+                 style={'margin-top':'20px', "font-style":"italic"}),
+        dbc.Row([
+            summary_card('Market value', f"{summary['value']:,.0f}"),
+            summary_card('Exact return', f"{summary['exact']:.4f}%"),
+            summary_card('Johansson\'s method', f"{summary['jm']:.4f}%"),
+            summary_card('Basic method', f"{summary['bm']:.4f}%"),
+        ], style={'margin-top':'20px'}),
+        dbc.Row([
+            summary_card('', ''),
+            summary_card('Largest holding error', f"JM {summary['max_error_jm']:.4f}% / BM {summary['max_error_bm']:.4f}%"),
+            summary_card('Portfolio JM error', f"{summary['error_jm']:.4f}%"),
+            summary_card('Portfolio BM error', f"{summary['error_bm']:.4f}%"),
+        ], style={'margin-top':'10px'}),
+    ]
+
+layout = html.Div(
+    [
+     html.Div("Fixed Income > Portfolio Returns", style={"font-style":"italic", "padding-bottom":'15px'}),
+     html.H3("Return approximations on a whole portfolio", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
+     dcc.Markdown(f'''Upload a CSV file of bond holdings with the columns `{"`, `".join(HOLDING_COLUMNS)}`
+                  (coupon and yields in percent, maturity in years) and every holding gets its exact, Johansson's
+                  and basic method return over the horizon, together with the value weighted portfolio returns.
+                  Large files are fine, they are processed in the background.'''),
+     slider_row("Horizon (months)",
+                dcc.Slider(id='portfolio-horizon', **HORIZON, value=12,
+                           marks={i: str(i) for i in [1, 3, 6, 9, 12]})),
+     slider_row("Coupon frequency",
+                dcc.RadioItems(id='portfolio-freq', value=1, inline=True, inputStyle={'margin-right':'5px', 'margin-left':'15px'},
+                               options=[{'label':label, 'value':freq} for freq, label in FREQUENCIES.items()])),
+     dcc.Upload(id='portfolio-upload', children=html.Div(['Drag and drop or ', html.A('select a holdings file')]),
+                accept='.csv,text/csv',
+                style={'margin-top':'30px', 'padding':'30px', 'textAlign':'center', 'cursor':'pointer',
+                       'border':'1px dashed rgb(151,160,175,1)', 'borderRadius':'10px'}),
+     dbc.Progress(id='portfolio-progress', value=0, style={'margin-top':'30px', 'height':'20px'}),
+     html.Div(id='portfolio-status', style={'margin-top':'10px', "font-style":"italic"}),
+     dcc.Store(id='portfolio-file'),
+     dcc.Store(id='portfolio-job'),
+     dcc.Store(id='portfolio-done'),
+     dcc.Interval(id='portfolio-poll', interval=500, disabled=True),
+     html.Div(id='portfolio-summary'),
+     # only the visible page of holdings is sent to the browser
+     dash_table.DataTable(
+         id='portfolio-table',
+         columns=[{"name": COLUMN_NAMES[col], "id": col} for col in RESULT_COLUMNS],
+         data=[],
+         page_current=0,
+         page_size=PAGE_SIZE,
+         page_action='custom',
+         sort_action='custom',
+         sort_mode='single',
+         sort_by=[],
+         style_header={
+             'backgroundColor': 'rgb(30, 30, 30)',
+             'color': 'white',
+             'textAlign':'center',
+         },
+         style_data={
+             'backgroundColor': 'rgb(50, 50, 50)',
+             'color': 'white'
+         },
+         style_table={'margin-top':'30px', 'overflowX':'auto'},
+     ),
+    ],
+    className='content',
+)
+
+@callback(
+    Output('portfolio-file', 'data'),
+    Input('portfolio-upload', 'contents'),
+    prevent_initial_call=True,
+)
+def upload_holdings(contents):
+    return save_holdings(contents)
+
+@callback(
+    Output('portfolio-job', 'data'),
+    Input('portfolio-file', 'data'),
+    Input('portfolio-horizon', 'value'),
+    Input('portfolio-freq', 'value'),
+    prevent_initial_call=True,
+)
+def submit_holdings(name, months, freq):
+    # the file name comes back from the browser: only an upload's hash is accepted
+    if not isinstance(name, str) or not UPLOAD_NAME.fullmatch(name):
+        return dash.no_update
+    # identical files and parameters map to the same job
+    return jobs.submit(process_holdings, name=name, dt=int(snap(months, **HORIZON))/12,
+                       freq=choice(freq, FREQUENCIES))
+
+@callback(
+    Output('portfolio-progress', 'value'),
+    Output('portfolio-status', 'children'),
+    Output('portfolio-summary', 'children'),
+    Output('portfolio-done', 'data'),
+    Output('portfolio-poll', 'disabled'),
+    Input('portfolio-poll', 'n_intervals'),
+    Input('portfolio-job', 'data'),
+    prevent_initial_call=True,
+)
+def poll_holdings(n_intervals, key):
+    job = jobs.status(key)
+    if job is None:
+        return 0, 'The file was not found, please upload it again.', None, None, True
+    if job['status'] == 'queued':
+        return 0, 'Waiting for a free worker...', None, None, False
+    if job['status'] == 'running':
+        return job['progress']*100, job['message'], dash.no_update, None, False
+    if job['status'] == 'failed':
+        return 0, f"The file could not be processed ({job['error']}).", None, None, True
+    return 100, '', generate_summary(jobs.result(key)), key, True
+
+@callback(
+    Output('portfolio-table', 'data'),
+    Output('portfolio-table', 'page_count'),
+    Input('portfolio-done', 'data'),
+    Input('portfolio-table', 'page_current'),
+    Input('portfolio-table', 'page_size'),
+    Input('portfolio-table', 'sort_by'),
+)
+def page_holdings(key, page, size, sort_by):
+    job = jobs.status(key) if key else None
+    if job is None or job['status'] != 'done':
+        return [], 0
+    # the results file comes from the job, never from the browser
+    summary = jobs.result(key)
+    if not isinstance(summary, dict) or 'results' not in summary:
+        return [], 0
+    sort = sort_by[0] if sort_by and sort_by[0]['column_id'] in RESULT_COLUMNS else None
+    X = results_page(summary['results'], page or 0, size, sort and sort['column_id'],
+                     bool(sort) and sort['direction'] == 'desc')
+    data = [{col: (int(v) if col == 'row' else round(float(v), 6)) for col, v in zip(RESULT_COLUMNS, row)} for row in X]
+    return data, -(-summary['holdings']//size)
@@ -3,7 +3,7 @@ from dash import dcc, html, callback, Output, Input
 import plotly.express as px
 import dash_bootstrap_components as dbc
 
-dash.register_page(__name__, name='Sample App')
+dash.register_page(__name__, name='Sample App', order=9, nav=False, cache=True) # hidden from the sidebar
 
 layout = html.Div(
     [
@@ -0,0 +1,144 @@
+import dash
+from dash import dcc, html, callback, Output, Input, State, dash_table
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import dash_bootstrap_components as dbc
+import numpy as np
+
+from fixed_income.simulation import simulate
+from utils import jobs
+from utils.controls import choice, slider_row, snap
+
+dash.register_page(__name__, name='Scenario Simulator', order=6)
+
+METHOD_NAMES = {'jm': "Johansson's method", 'bm': 'Basic method'}
+MODELS = {'vasicek': 'Vasicek', 'shock': 'Parallel shocks'}
+YIELD = {'min': 0, 'max': 10, 'step': 0.25}
+SIGMA = {'min': 0.25, 'max': 3, 'step': 0.25}
+HORIZON = {'min': 1, 'max': 12, 'step': 1}
+PATHS = (10_000, 100_000, 1_000_000)
+
+def generate_graph_simulation(result):
+    # widest error within the 1%-99% quantiles, for every coupon and maturity
+    levels = list(result['quantile_levels'])
+    fig = make_subplots(rows=1, cols=2, subplot_titles=list(METHOD_NAMES.values()), horizontal_spacing=0.12)
+    for i, method in enumerate(METHOD_NAMES):
+        q = result['quantiles'][method]
+        band = np.maximum(np.abs(q[levels.index(0.01)]), np.abs(q[levels.index(0.99)]))
+        fig.add_trace(go.Heatmap(z=band, x=[str(T) for T in result['maturities']],
+                                 y=[f'{c*100:g}' for c in result['coupons']], coloraxis='coloraxis' if i == 0 else 'coloraxis2'),
+                      row=1, col=i+1)
+    fig.update_layout(template='plotly_dark', title='98% error band (%) by coupon and maturity',
+                      coloraxis={'colorbar': {'x': 0.44}}, coloraxis2={'colorbar': {'x': 1.0}})
+    fig.update_xaxes(title='Maturity (years)', type='category')
+    fig.update_yaxes(title='Coupon (%)', type='category')
+    fig = fig.update_layout({"plot_bgcolor": "rgba(0, 0, 0, 0)", "paper_bgcolor": "rgba(22,26,29, 1)"})
+
+    return fig
+
+def generate_table_simulation(result):
+    levels = list(result['quantile_levels'])
+    columns = [{"name": ["", "Coupon"], "id": "coupon"}, {"name": ["", "Maturity"], "id": "maturity"}]
+    data = [{'coupon': f'{c*100:g}%', 'maturity': f'{T}Y'} for c in result['coupons'] for T in result['maturities']]
+    for method, name in METHOD_NAMES.items():
+        for q in (0.01, 0.5, 0.99):
+            columns.append({"name": [name, f'{q:.0%} quantile'], "id": f'{method}{q}'})
+            for row, value in zip(data, result['quantiles'][method][levels.index(q)].ravel()):
+                row[f'{method}{q}'] = f'{value:.4f}%'
+    return dash_table.DataTable(
+        columns=columns,
+        data=data,
+        merge_duplicate_headers=True,
+        page_size=10,
+        style_header={
+            'backgroundColor': 'rgb(30, 30, 30)',
+            'color': 'white',
+            'textAlign':'center',
+        },
+        style_data={
+            'backgroundColor': 'rgb(50, 50, 50)',
+            'color': 'white'
+        },
+    )
+
+layout = html.Div(
+    [
+     html.Div("Fixed Income > Scenario Simulator", style={"font-style":"italic", "padding-bottom":'15px'}),
+     html.H3("How accurate are the approximations on random scenarios?", style={'margin-top':'30px', 'margin-bottom':'10px', 'font-weight':'bold'}),
+     dcc.Markdown('''The [discussion on bond returns](/fixed-income/discussion-br) checks Johansson's and the basic method
+                  along a fixed grid of yield changes. Here the yields follow random paths instead: either a Vasicek
+                  short rate that moves the whole curve or plain parallel shocks, over horizons between one month and
+                  a year. Every path prices bonds of five coupons and five maturities, and the error distribution of
+                  each method is summarized by its quantiles.'''),
+     slider_row("Yield model",
+                dcc.RadioItems(id='simulator-model', value='vasicek', inline=True, inputStyle={'margin-right':'5px', 'margin-left':'15px'},
+                               options=[{'label':label, 'value':model} for model, label in MODELS.items()])),
+     slider_row("Starting yield (%)",
+                dcc.Slider(id='simulator-yield', **YIELD, value=4,
+                           marks={i: str(i) for i in range(0, 11, 2)})),
+     slider_row("Volatility (% per year)",
+                dcc.Slider(id='simulator-sigma', **SIGMA, value=1,
+                           marks={i: str(i) for i in range(0, 4)})),
+     slider_row("Horizon (months)",
+                dcc.RangeSlider(id='simulator-horizon', **HORIZON, value=[1, 12],
+                                marks={i: str(i) for i in [1, 3, 6, 9, 12]})),
+     slider_row("Number of paths",
+                dcc.RadioItems(id='simulator-paths', value=100_000, inline=True, inputStyle={'margin-right':'5px', 'margin-left':'15px'},
+                               options=[{'label':f'{n:,}', 'value':n} for n in PATHS])),
+     dbc.Button('Run simulation', id='simulator-run', n_clicks=0, className='homeButton', style={'margin-top':'30px'}),
+     dbc.Progress(id='simulator-progress', value=0, style={'margin-top':'30px', 'height':'20px'}),
+     html.Div(id='simulator-status', style={'margin-top':'10px', "font-style":"italic"}),
+     dcc.Store(id='simulator-job'),
+     dcc.Interval(id='simulator-poll', interval=500, disabled=True),
+     html.Div(id='simulator-results'),
+    ],
+    className='content',
+)
+
+@callback(
+    Output('simulator-job', 'data'),
+    Input('simulator-run', 'n_clicks'),
+    State('simulator-model', 'value'),
+    State('simulator-yield', 'value'),
+    State('simulator-sigma', 'value'),
+    State('simulator-horizon', 'value'),
+    State('simulator-paths', 'value'),
+    prevent_initial_call=True,
+)
+def submit_simulation(n_clicks, model, y0, sigma, horizon, paths):
+    # only what the controls can send is queued: a forged request must not
+    # tie up the job workers; identical parameters map to the same job
+    if not isinstance(horizon, list) or len(horizon) != 2:
+        raise PreventUpdate
+    months = sorted(int(snap(h, **HORIZON)) for h in horizon)
+    key = jobs.submit(simulate, n_paths=choice(paths, PATHS), model=choice(model, MODELS),
+                      y0=snap(y0, **YIELD)/100, sigma=snap(sigma, **SIGMA)/100,
+                      horizon=[months[0]/12, months[1]/12])
+    return key
+
+@callback(
+    Output('simulator-progress', 'value'),
+    Output('simulator-status', 'children'),
+    Output('simulator-results', 'children'),
+    Output('simulator-poll', 'disabled'),
+    Input('simulator-poll', 'n_intervals'),
+    Input('simulator-job', 'data'),
+    prevent_initial_call=True,
+)
+def poll_simulation(n_intervals, key):
+    # the job runs in a background worker, the page polls until it is done
+    job = jobs.status(key)
+    if job is None:
+        return 0, 'The simulation was not found, please run it again.', None, True
+    if job['status'] == 'queued':
+        return 0, 'Waiting for a free worker...', None, False
+    if job['status'] == 'running':
+        return job['progress']*100, job['message'], dash.no_update, False
+    if job['status'] == 'failed':
+        return 0, f"The simulation failed ({job['error']}).", None, True
+    result = jobs.result(key)
+    return 100, f"{result['paths']:,} paths simulated.", [
+        dcc.Graph(figure=generate_graph_simulation(result), style={'margin':'30px'}),
+        generate_table_simulation(result),
+    ], True
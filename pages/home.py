@@ -4,7 +4,7 @@ import plotly.express as px
 import dash_bootstrap_components as dbc
 
 
-dash.register_page(__name__, path='/', name='Home') # '/' is home page
+dash.register_page(__name__, path='/', name='Home', order=0, cache=True) # '/' is home page
 
 # Homepage
 def get_path(page):
@@ -37,9 +37,21 @@ layout = html.Div(
                 # dbc.Button('Sample App', id='sample-app-button', 
                 #                href='/fixed-income/sample-app',
                 #                n_clicks=0, className='homeButton')
+                dbc.Button('Scenario Simulator', id='simulator-button',
+                           href='/fixed-income/scenario-simulator',
+                           n_clicks=0, className='homeButton')
                 ),
-            dbc.Col(),
+            dbc.Col(dbc.Button('JM Error Explorer', id='explorer-button', 
+                               href='/fixed-income/error-explorer',
+                               n_clicks=0, className='homeButton')),
         ]),
+        dbc.Row([
+            dbc.Col(dbc.Button('Portfolio Returns', id='portfolio-button',
+                               href='/fixed-income/portfolio-returns',
+                               n_clicks=0, className='homeButton')),
+            dbc.Col(),
+            dbc.Col(),
+        ], style={'margin-top':'20px'}),
 
     ],
     className='content',
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from fixed_income import bond_analytics, bond_price, bond_yield, cash_received, return_jm_batch, year_fraction
+from fixed_income import analytics
+from fixed_income.analytics import FACE
+
+
+def loop_error_jm(T, c, y0, y1):
+    # the original per bond loop of the article, one year horizon
+    dt = 1
+    T0 = np.arange(1, T+1)
+    cf0 = np.ones(T)*c*100
+    cf0[-1] = cf0[-1] + 100
+    dcf0 = (1/(1+y0)**T0)*cf0
+    P0 = np.sum(dcf0)
+
+    T1 = T0 - dt
+    T1 = T1[T1 > 0]
+    cf1 = cf0[T0 - dt > 0]
+    P1 = np.sum((1/(1+y1)**T1)*cf1)
+    r = (P1+100*c)/P0 - 1
+
+    mod_dur0 = np.sum(dcf0*T0)/(1+y0)/P0
+    convex0 = np.sum((T0**2+T0)*dcf0)/(1+y0)**2/P0
+    rc0 = np.log(1+y0)*dt - mod_dur0*(y1-y0) + 0.5*(convex0 - mod_dur0**2)*(y1-y0)**2 + (y1-y0)*dt/(1+y0)
+    return (r - (np.exp(rc0)-1))*100
+
+
+def loop_analytics(c, y, T, freq):
+    # explicit sum over the cashflows, the next one less than a period away
+    # for fractional maturities
+    i = y/freq
+    n = int(np.ceil(T*freq - 1e-9))
+    t = T*freq - np.arange(n)[::-1]
+    cash = np.full(n, c*FACE/freq)
+    cash[-1] += FACE
+    pv = cash/(1+i)**t
+    P = pv.sum()
+    return P, (pv*t).sum()/(freq*(1+i)*P), (pv*t*(t+1)).sum()/(freq**2*(1+i)**2*P)
+
+
+def test_batch_error_matches_loop():
+    c = np.linspace(0, 200, 5)/1000
+    y = np.arange(-200, 1001, 25)/10000
+    # (the loop leaves out the redemption of a bond maturing within the year)
+    for T in (2, 5, 30):
+        _, _, error = return_jm_batch(T, c[None,:], 0.04, y[:,None])
+        expected = [[loop_error_jm(T, c_i, 0.04, y_i) for c_i in c] for y_i in y]
+        np.testing.assert_allclose(error, expected, rtol=1e-9, atol=1e-11)
+
+
+@pytest.mark.parametrize('freq', [1, 2, 4, 12])
+@pytest.mark.parametrize('T', [0.3, 1, 2.75, 10, 30.5])
+def test_closed_form_matches_cashflow_sum(freq, T):
+    for c, y in [(0.05, 0.04), (0.0, 0.03), (0.08, 0.0), (0.02, 1e-6), (0.04, -0.005)]:
+        expected = loop_analytics(c, y, T, freq)
+        np.testing.assert_allclose(bond_analytics(c, y, T, freq), expected, rtol=1e-10)
+
+
+def test_matured_bonds():
+    P, mod_dur, convex = bond_analytics(0.05, 0.04, [0, -1], 2)
+    np.testing.assert_array_equal(P, 0)
+    assert np.isnan(mod_dur).all() and np.isnan(convex).all()
+
+
+def test_par_bond_prices_at_face():
+    np.testing.assert_allclose(bond_price(0.05, 0.05, [1, 5, 30], freq=2), FACE)
+
+
+def test_cash_received():
+    # a 2.25 year semiannual bond pays three coupons in the next 1.5 years,
+    # and everything in the next 3
+    np.testing.assert_allclose(cash_received(0.04, 2.25, [1.5, 3], freq=2), [6, 110])
+
+
+def test_year_fraction():
+    start = np.datetime64('2023-01-31')
+    end = np.array(['2023-02-28', '2023-03-31', '2024-01-31'], dtype='datetime64[D]')
+    np.testing.assert_allclose(year_fraction(start, end), [28/360, 60/360, 1])
+    np.testing.assert_allclose(year_fraction(start, end, 'ACT/365'), [28/365, 59/365, 365/365])
+    with pytest.raises(ValueError):
+        year_fraction(start, end, 'ACT/ACT')
+
+
+def test_yield_round_trip():
+    rng = np.random.default_rng(0)
+    n = 2000
+    c = rng.uniform(0, 0.15, n)
+    y = rng.uniform(-0.02, 0.4, n)
+    T = rng.uniform(0.1, 40, n)
+    freq = rng.choice([1, 2, 4, 12], n)
+    solved, converged = bond_yield(bond_price(c, y, T, freq), c, T, freq)
+    assert converged.all()
+    np.testing.assert_allclose(solved, y, atol=1e-9)
+
+
+def test_yield_of_extreme_prices_falls_back_to_bisection(monkeypatch):
+    # deep discounts and premiums where Newton overshoots
+    bisected = []
+    bisect = analytics._bisect_yield
+    monkeypatch.setattr(analytics, '_bisect_yield', lambda price, *args: bisected.append(len(price)) or bisect(price, *args))
+    c, T = np.array([0.0, 0.2, 0.01]), np.array([30, 0.05, 50])
+    y = np.array([0.9, -0.5, 0.6])
+    solved, converged = bond_yield(bond_price(c, y, T), c, T)
+    assert bisected and converged.all()
+    np.testing.assert_allclose(bond_price(c, solved, T), bond_price(c, y, T), atol=1e-10)
+
+
+def test_yield_is_nan_without_a_price_or_cashflows():
+    y, converged = bond_yield([0, -5, np.nan, 100], 0.05, [5, 5, 5, 0])
+    assert np.isnan(y).all()
+    assert not converged.any()
+
+
+def test_scalar_error_wrapper():
+    from fixed_income import return_error_jm
+    for T, c, y1 in [(5, 0.04, 0.05), (30, 0.0, 0.02), (2, 0.1, -0.01)]:
+        assert return_error_jm(T, c, 0.04, y1) == pytest.approx(loop_error_jm(T, c, 0.04, y1), rel=1e-9)
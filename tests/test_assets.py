@@ -0,0 +1,33 @@
+import flask
+import pytest
+
+from utils import assets
+from utils.assets import parse_accept_encoding, response_encoding
+
+app = flask.Flask(__name__)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip, deflate, br') == {'gzip': 1, 'deflate': 1, 'br': 1}
+    assert parse_accept_encoding('GZIP;q=0.5 , br ; q=0, *;q=0.1') == {'gzip': 0.5, 'br': 0, '*': 0.1}
+    assert parse_accept_encoding('gzip;q=x, identity;q=2') == {'gzip': 0, 'identity': 1}
+    assert parse_accept_encoding('') == {}
+
+
+@pytest.mark.parametrize('header, brotli, expected', [
+    ('gzip, deflate, br', True, 'br'),
+    ('gzip, deflate, br', False, 'gzip'),
+    ('br;q=0, gzip', True, 'gzip'),
+    ('gzip;q=0', False, None),
+    ('br;q=0.5, gzip', True, 'gzip'),
+    ('*', True, 'br'),
+    ('*;q=0.2, br;q=0', True, 'gzip'),
+    ('gzip;q=0, *', False, None),
+    ('identity', True, None),
+    (None, True, None),
+])
+def test_response_encoding(monkeypatch, header, brotli, expected):
+    monkeypatch.setattr(assets, 'brotli', object() if brotli else None)
+    headers = {} if header is None else {'Accept-Encoding': header}
+    with app.test_request_context(headers=headers):
+        assert response_encoding() == expected
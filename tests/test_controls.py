@@ -0,0 +1,75 @@
+import pytest
+from dash.exceptions import PreventUpdate
+
+from utils import jobs
+from utils.controls import choice, snap
+
+
+def test_snap():
+    assert snap(0.3, 0, 10, 0.25) == 0.25
+    assert snap('7', 1, 12, 1) == 7
+    assert snap(10**12, 1, 12, 1) == 12
+    assert snap(float('-inf'), 0.25, 3, 0.25) == 0.25
+    for value in (None, 'x', float('nan'), [1]):
+        with pytest.raises(PreventUpdate):
+            snap(value, 0, 10, 1)
+
+
+def test_choice():
+    assert choice(2.0, (1, 2, 4)) == 2
+    for value in (3, True, None, [1], 'vasicek '):
+        with pytest.raises(PreventUpdate):
+            choice(value, {1: '', 2: '', 'vasicek': ''})
+
+
+def simulation_request(model='vasicek', y0=4, sigma=1, horizon=(1, 12), paths=100_000):
+    states = [('simulator-model', model), ('simulator-yield', y0), ('simulator-sigma', sigma),
+              ('simulator-horizon', list(horizon)), ('simulator-paths', paths)]
+    return {'output': 'simulator-job.data', 'outputs': {'id': 'simulator-job', 'property': 'data'},
+            'inputs': [{'id': 'simulator-run', 'property': 'n_clicks', 'value': 1}],
+            'state': [{'id': i, 'property': 'value', 'value': v} for i, v in states],
+            'changedPropIds': ['simulator-run.n_clicks']}
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs, 'submit', lambda func, **params: calls.append(params) or 'key')
+    return calls
+
+
+@pytest.fixture(scope='module')
+def client():
+    return pytest.importorskip('app').server.test_client()
+
+
+def test_simulation_parameters_are_clamped(client, submitted):
+    client.post('/_dash-update-component', json=simulation_request(y0=55, sigma=-1, horizon=(40, 0.2)))
+    assert submitted == [{'n_paths': 100_000, 'model': 'vasicek', 'y0': 0.1, 'sigma': 0.0025, 'horizon': [1/12, 1]}]
+
+
+@pytest.mark.parametrize('request_args', [{'paths': 10**12}, {'paths': 12345}, {'model': 'other'},
+                                          {'horizon': (1,)}, {'y0': 'x'}])
+def test_forged_simulations_are_not_queued(client, submitted, request_args):
+    response = client.post('/_dash-update-component', json=simulation_request(**request_args))
+    assert response.status_code == 204 and not submitted
+
+
+def explorer_request(maturity=5, y0=4, months=12, coupons=(0, 20), n_coupons=5, freq=1):
+    values = [('explorer-maturity', maturity), ('explorer-yield', y0), ('explorer-horizon', months),
+              ('explorer-coupons', list(coupons)), ('explorer-n-coupons', n_coupons), ('explorer-freq', freq)]
+    return {'output': 'graph-explorer.figure', 'outputs': {'id': 'graph-explorer', 'property': 'figure'},
+            'inputs': [{'id': i, 'property': 'value', 'value': v} for i, v in values],
+            'changedPropIds': ['explorer-n-coupons.value']}
+
+
+def test_explorer_surface_is_bounded(client):
+    response = client.post('/_dash-update-component', json=explorer_request(maturity=10**6, coupons=(50, -3),
+                                                                           n_coupons=10**6))
+    traces = response.get_json()['response']['graph-explorer']['figure']['data']
+    assert [t['name'] for t in traces] == [f'{c:.2f}' for c in (0, 2.5, 5, 7.5, 10, 12.5, 15, 17.5, 20)]
+
+
+@pytest.mark.parametrize('request_args', [{'freq': 3}, {'coupons': (1,)}, {'n_coupons': None}])
+def test_forged_explorer_values_are_ignored(client, request_args):
+    assert client.post('/_dash-update-component', json=explorer_request(**request_args)).status_code == 204
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from fixed_income import bond_price, bootstrap, get_curve
+from fixed_income.analytics import FACE
+
+
+@pytest.mark.parametrize('freq', [1, 2])
+def test_bootstrap_reprices_sparse_par_bonds(freq):
+    tenors, par = [1, 2, 5, 10, 30], [0.03, 0.035, 0.04, 0.045, 0.042]
+    curve = bootstrap(tenors, par, freq, short_rate=0.025)
+    np.testing.assert_allclose(curve.bond_price(par, tenors), FACE, atol=1e-9)
+
+
+def test_bootstrap_reprices_every_coupon_date_in_closed_form():
+    tenors = np.arange(1, 21)/2
+    par = 0.02 + 0.03*(1 - np.exp(-tenors/3))
+    curve = bootstrap(tenors, par, freq=2)
+    np.testing.assert_allclose(curve.bond_price(par, tenors), FACE, atol=1e-9)
+
+
+def test_flat_par_curve_is_flat():
+    curve = bootstrap([1, 2, 3, 5], [0.04]*4)
+    np.testing.assert_allclose(curve.zeros, 0.04, atol=1e-12)
+    np.testing.assert_allclose(curve.forward(1, 3), 0.04, atol=1e-12)
+
+
+def test_implied_yield_reprices_the_forward_price():
+    # the second example of the article
+    curve = get_curve([2, 5], [0.005, 0.04], short_rate=0.0025)
+    np.testing.assert_allclose(curve.bond_price([0.005, 0.04], [2, 5]), FACE, atol=1e-9)
+    y = curve.implied_yield([0.005, 0.04], [2, 5], 1)
+    np.testing.assert_allclose(bond_price([0.005, 0.04], y, [1, 4]), curve.bond_price([0.005, 0.04], [2, 5], 1),
+                               atol=1e-9)
+
+
+def test_bootstrap_rejects_off_grid_tenors():
+    with pytest.raises(ValueError):
+        bootstrap([1, 2.3], [0.03, 0.04])
+    with pytest.raises(ValueError):
+        bootstrap([2, 1], [0.03, 0.04])
@@ -0,0 +1,68 @@
+import base64
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.figures import DAY_NS, encode_figure
+
+
+def unpack(packed):
+    return np.frombuffer(base64.b64decode(packed['bdata']), np.dtype(packed['dtype']).newbyteorder('<'))
+
+
+def decode(encoded):
+    # what assets/figures.js does, x in milliseconds since the epoch
+    scale = DAY_NS//10**6 if encoded['dates']['unit'] == 'D' else 1
+    dates = unpack(encoded['dates']).astype(np.float64)*scale
+    return [(dates[unpack(t['xi'])], unpack(t['y'])) if 'xi' in t else (t.get('x'), t.get('y'))
+            for t in encoded['data']]
+
+
+def milliseconds(x):
+    return np.array(x, dtype='datetime64[ms]').astype(np.float64)
+
+
+def test_traces_share_one_date_axis():
+    x1 = pd.date_range('2020-01-01', periods=300, freq='B')
+    x2 = x1[::7]
+    nav = 100*np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(x1))))
+    fig = go.Figure([go.Scatter(x=x1, y=nav), go.Scatter(x=x2, y=np.arange(len(x2)) % 7 + 1)]).to_dict()
+    encoded = encode_figure(fig)
+
+    assert encoded['dates']['unit'] == 'D' and len(unpack(encoded['dates'])) == len(x1)
+    assert [t['xi']['dtype'] for t in encoded['data']] == ['u2', 'u2']
+    (dx1, y1), (dx2, y2) = decode(encoded)
+    np.testing.assert_array_equal(dx1, milliseconds(x1))
+    np.testing.assert_array_equal(dx2, milliseconds(x2))
+    np.testing.assert_allclose(y1, nav, rtol=0, atol=1e-5*np.ptp(nav))
+    np.testing.assert_array_equal(y2, np.arange(len(x2)) % 7 + 1)
+    assert encoded['layout']['xaxis']['type'] == 'date'
+
+
+def test_value_types():
+    x = ['2021-01-04', '2021-01-05', '2021-01-06', '2021-01-07']
+    cases = [([1, 2, 3, 4], 'i2'),                       # ranks
+             ([1, 2, 3, 40000], 'f4'),                   # whole, but past int16
+             ([100.5, 101.25, 99.0, np.nan], 'f4'),      # a gap
+             ([1e8, 1e8 + 0.5, 1e8 + 1, 1e8 + 2], 'f8'),    # float32 would move a value visibly
+             ([1.0, 2.0, 3.0, np.nan], 'f4')]            # whole numbers with a gap are not int16
+    encoded = encode_figure({'data': [{'x': x, 'y': y} for y, _ in cases], 'layout': {}})
+    assert [t['y']['dtype'] for t in encoded['data']] == [dtype for _, dtype in cases]
+    for (_, y), (values, _) in zip(decode(encoded), cases):
+        np.testing.assert_allclose(y, values, rtol=0, atol=1e-5*(np.nanmax(values) - np.nanmin(values)), equal_nan=True)
+
+
+def test_nan_gaps_and_intraday_dates_round_trip():
+    x = ['2021-01-04 09:30:00', '2021-01-04 16:00:00.250', '2021-01-05 09:30:00']
+    encoded = encode_figure({'data': [{'x': x, 'y': [1.5, None, 2.5]}], 'layout': {}})
+    assert encoded['dates']['unit'] == 'ms'
+    [(dx, y)] = decode(encoded)
+    np.testing.assert_allclose(dx, milliseconds(x), rtol=0, atol=1e-3)
+    np.testing.assert_array_equal(np.isnan(y), [False, True, False])
+
+
+def test_other_traces_are_left_alone():
+    fig = {'data': [{'x': ['a', 'b'], 'y': [1, 2]}, {'x': [1, 2, 3], 'y': [1, 2]}, {'type': 'heatmap', 'z': [[1]]}],
+           'layout': {'title': 't'}}
+    assert encode_figure(fig) == {'data': fig['data'], 'layout': fig['layout']}
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from funds import lttb_indices, update_running_stats
+
+
+def nav(rows=400, managers=4, seed=0):
+    rng = np.random.default_rng(seed)
+    index = np.arange(np.datetime64('2020-01-01'), np.datetime64('2020-01-01') + rows).astype('datetime64[ns]')
+    X = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (rows, managers)), axis=0))
+    # a manager starting late, one with gaps and one without any data
+    X[:50, 1] = np.nan
+    X[rng.random(rows) < 0.1, 2] = np.nan
+    X[:, 3] = np.nan
+    return index, X
+
+
+def assert_stats_equal(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        if a[key].dtype.kind == 'f':
+            np.testing.assert_allclose(a[key], b[key], rtol=1e-10, atol=1e-14, err_msg=key)
+        else:
+            np.testing.assert_array_equal(a[key], b[key], err_msg=key)
+
+
+@pytest.mark.parametrize('splits', [[1], [200], [10, 49, 50, 51, 399], list(range(1, 400))])
+def test_merged_stats_match_full_recompute(splits):
+    index, X = nav()
+    stats = None
+    for lo, hi in zip([0] + splits, splits + [len(X)]):
+        stats = update_running_stats(stats, index[lo:hi], X[lo:hi])
+    assert_stats_equal(stats, update_running_stats(None, index, X))
+
+
+def test_running_stats_values():
+    index, X = nav()
+    stats = update_running_stats(None, index, X)
+    r = np.diff(np.log(X[50:, 1]))
+    np.testing.assert_allclose(stats['mean'][1], r.mean())
+    np.testing.assert_allclose(stats['m2'][1], ((r - r.mean())**2).sum())
+    norm = X[:, 0]/X[0, 0]
+    np.testing.assert_allclose(stats['max_dd'][0], (norm/np.maximum.accumulate(norm) - 1).min())
+    assert stats['first_date'][1] == index[50]
+    np.testing.assert_array_equal(stats['complete'], [True, False, True, False])
+    assert np.isnan(stats['first'][3]) and stats['count'][3] == 0
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    from funds import ingest, store
+    for module, attr, path in [(store, 'DATA_DIR', 'data'), (store, 'STORE_DIR', 'store'),
+                               (store, 'INGEST_DIR', 'ingested'), (ingest, 'STORE_DIR', 'store')]:
+        monkeypatch.setattr(module, attr, tmp_path / path)
+    monkeypatch.setitem(store.DATASETS, 'test', {'file': 'test.csv', 'date_column': 'Fecha',
+                                                 'date_format': '%m/%d/%Y', 'nav': True})
+    index, X = nav()
+    frame = pd.DataFrame(X, index=pd.DatetimeIndex(index, name='Fecha'), columns=['A', 'B', 'C', 'D'])
+    (tmp_path / 'data').mkdir()
+    frame.iloc[:300].to_csv(tmp_path / 'data' / 'test.csv', date_format='%m/%d/%Y')
+    yield frame
+    store._handles.pop('test', None)
+
+
+def test_ingest_matches_a_full_conversion(store):
+    from funds.ingest import ingest
+    from funds.store import DATA_DIR, convert, load_dataset
+    source = (DATA_DIR / 'test.csv').read_bytes()
+
+    assert ingest('test', store.iloc[250:350]) == 50
+    assert ingest('test', store.iloc[350:]) == 50
+    appended = load_dataset('test')
+    values, norm, stats = appended.values(), appended.values(normalized=True), appended.stats
+
+    # the tracked CSV is left alone, and a rebuild reads the ingested rows back
+    assert (DATA_DIR / 'test.csv').read_bytes() == source
+    convert('test')
+    rebuilt = load_dataset('test')
+    np.testing.assert_array_equal(rebuilt.index, store.index.values)
+    np.testing.assert_allclose(rebuilt.values(), values)
+    np.testing.assert_allclose(rebuilt.values(normalized=True), norm)
+    assert_stats_equal(rebuilt.stats, stats)
+
+
+def test_lttb_keeps_the_ends():
+    index, X = nav()
+    idx = lttb_indices(index.astype(np.int64), X, 40)
+    assert idx.shape == (40, X.shape[1])
+    assert (idx[0] == 0).all() and (idx[-1] == len(X) - 1).all()
+    assert (np.diff(idx, axis=0) > 0).all()
+
+
+@pytest.mark.parametrize('n_out', [400, 1000])
+def test_lttb_keeps_every_row_of_short_series(n_out):
+    index, X = nav()
+    idx = lttb_indices(index.astype(np.int64), X, n_out)
+    np.testing.assert_array_equal(idx, np.repeat(np.arange(len(X))[:,None], X.shape[1], axis=1))
+
+
+@pytest.mark.parametrize('n_out', [5, 40, 399])
+def test_lttb_never_picks_nan_over_a_value(n_out):
+    index, X = nav()
+    idx = lttb_indices(index.astype(np.int64), X, n_out)
+    # n_out - 2 buckets between the first and the last row
+    edges = np.linspace(1, len(X) - 1, n_out - 1).astype(np.int64)
+    for c in range(X.shape[1]):
+        for j, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+            assert lo <= idx[j + 1, c] < hi
+            if not np.isnan(X[lo:hi, c]).all():
+                assert not np.isnan(X[idx[j + 1, c], c])
@@ -0,0 +1,72 @@
+import importlib
+import sys
+
+import pytest
+
+from utils import jobs
+
+
+def square(x, progress):
+    progress(1, 'done')
+    return x*x
+
+
+def fail(progress):
+    raise RuntimeError('no luck')
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOBS_DIR', tmp_path)
+    monkeypatch.setattr(jobs, 'DB_PATH', tmp_path / 'jobs.sqlite')
+    monkeypatch.setattr(jobs, 'RESULTS_DIR', tmp_path / 'results')
+    jobs.results_cache.clear()
+    conn = jobs._connect()
+
+    def run_all():
+        while (job := jobs._claim(conn)) is not None:
+            jobs._run(conn, job['key'], job['task'], job['params'])
+    yield run_all
+    conn.close()
+
+
+def test_identical_submissions_share_a_job(queue):
+    key = jobs.submit(square, x=3)
+    assert jobs.submit(square, x=3) == key
+    assert jobs.submit(square, x=4) != key
+    assert jobs.status(key)['status'] == 'queued'
+    queue()
+    assert jobs.status(key) == {'status': 'done', 'progress': 1, 'message': 'done', 'error': None}
+    assert jobs.result(key) == 9
+    # a finished job is not queued again
+    jobs.submit(square, x=3)
+    assert jobs.status(key)['status'] == 'done'
+
+
+def test_failed_jobs_are_retried(queue):
+    key = jobs.submit(fail)
+    queue()
+    assert jobs.status(key)['status'] == 'failed'
+    assert jobs.status(key)['error'] == 'RuntimeError: no luck'
+    jobs.submit(fail)
+    assert jobs.status(key)['status'] == 'queued'
+
+
+def test_key_follows_the_whole_package(tmp_path, monkeypatch):
+    package = tmp_path / 'jobpkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'helpers.py').write_text('def double(x):\n    return 2*x\n')
+    (package / 'tasks.py').write_text('from jobpkg.helpers import double\n\n'
+                                      'def task(x, progress):\n    return double(x)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    importlib.import_module('jobpkg.tasks')
+    try:
+        before = jobs._source_hash('jobpkg.tasks')
+        (package / 'helpers.py').write_text('def double(x):\n    return x + x\n')
+        jobs._source_hash.cache_clear()
+        assert jobs._source_hash('jobpkg.tasks') != before
+    finally:
+        jobs._source_hash.cache_clear()
+        for module in ('jobpkg', 'jobpkg.helpers', 'jobpkg.tasks'):
+            sys.modules.pop(module, None)
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils import metrics
+
+ROUTE = ('/', 'GET')
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', tmp_path)
+    metrics.reset()
+    yield tmp_path
+    metrics.reset()
+
+
+def write(path, pid, count):
+    series = [[list(ROUTE), [count] + [0]*len(metrics.LATENCY_BUCKETS) + [0.5*count]]]
+    (path / f'{pid}-1.json').write_text(json.dumps({metrics.REQUEST_SECONDS.name: series}))
+
+
+def exited_pid():
+    return subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                          capture_output=True, text=True).stdout.strip()
+
+
+def count():
+    return metrics.collect()[metrics.REQUEST_SECONDS.name][ROUTE]
+
+
+def test_totals_never_decrease_when_workers_exit(snapshots):
+    exited = exited_pid()
+    write(snapshots, os.getppid(), 2)
+    write(snapshots, exited, 5)
+    metrics.REQUEST_SECONDS.observe(0.001, *ROUTE)
+
+    before = count()
+    assert before[0] == 8
+    # the dead worker's snapshot is folded into the retired totals, once
+    assert not (snapshots / f'{exited}-1.json').exists()
+    assert count() == before
+    write(snapshots, exited_pid(), 1)
+    after = count()
+    assert after[0] == 9 and all(a >= b for a, b in zip(after, before))
+
+
+def test_discard_keeps_unflushed_observations(snapshots):
+    metrics.REQUEST_SECONDS.observe(0.001, *ROUTE)
+    metrics.flush()
+    metrics.REQUEST_SECONDS.observe(0.002, *ROUTE)
+    metrics.discard()
+    metrics.discard()
+    assert [p.name for p in snapshots.glob('*.json')] == [metrics.RETIRED]
+    # both observations, counted once
+    assert count()[0] == 2
@@ -0,0 +1,43 @@
+import pytest
+
+from utils.page_cache import page_request, response_cache
+
+
+@pytest.fixture(scope='module')
+def client():
+    app = pytest.importorskip('app')
+    return app.server.test_client()
+
+
+def test_layout_is_served_from_the_cache_with_an_etag(client):
+    response_cache.clear()
+    first = client.get('/_dash-layout')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and response_cache.stats()['entries'] == 1
+    second = client.get('/_dash-layout')
+    assert second.headers['ETag'] == etag and second.data == first.data
+
+    not_modified = client.get('/_dash-layout', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304 and not_modified.data == b''
+    assert client.get('/_dash-layout', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_cached_page_revalidates(client):
+    first = client.post('/_dash-update-component', json=page_request('/fixed-income/discussion-br'))
+    assert first.status_code == 200
+    second = client.post('/_dash-update-component', json=page_request('/fixed-income/discussion-br'),
+                         headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+
+
+def test_entries_are_kept_per_encoding(client):
+    plain = client.get('/_dash-layout')
+    gzip = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers and gzip.headers['Content-Encoding'] == 'gzip'
+    assert plain.headers['ETag'] != gzip.headers['ETag']
+    assert 'Accept-Encoding' in gzip.headers['Vary']
+
+
+def test_uncached_requests_pass_through(client):
+    # pages without cache=True, and callbacks other than the page content
+    assert 'ETag' not in client.post('/_dash-update-component', json=page_request('/fixed-income/error-explorer')).headers
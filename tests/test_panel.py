@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from funds import load_dataset, load_panel
+from funds.panel import align, business_days, period_ends
+
+
+def days(*dates):
+    return np.array(dates, dtype='datetime64[D]')
+
+
+def test_business_days():
+    calendar = business_days('2023-01-06', '2023-01-10')
+    np.testing.assert_array_equal(calendar, days('2023-01-06', '2023-01-09', '2023-01-10'))
+
+
+def test_align_drops_weekend_rows():
+    # a carried forward Saturday row is not on the calendar
+    index = days('2023-01-05', '2023-01-06', '2023-01-07', '2023-01-09').astype('datetime64[ns]')
+    X = np.array([[1.0], [2.0], [2.5], [3.0]])
+    calendar = business_days('2023-01-04', '2023-01-11')
+    aligned = align(calendar, index, X)
+    np.testing.assert_array_equal(aligned[:,0], [np.nan, 1, 2, 3, np.nan, np.nan])
+
+
+def test_align_carries_gaps_forward():
+    # a fund without a Monday row keeps its Friday value
+    index = days('2023-01-06', '2023-01-10').astype('datetime64[ns]')
+    aligned = align(business_days('2023-01-06', '2023-01-10'), index, np.array([[1.0], [2.0]]))
+    np.testing.assert_array_equal(aligned[:,0], [1, 1, 2])
+
+
+def test_period_ends():
+    calendar = business_days('2023-01-26', '2023-02-07')
+    assert list(calendar[period_ends(calendar, 'weekly')]) == list(days('2023-01-27', '2023-02-03', '2023-02-07'))
+    assert list(calendar[period_ends(calendar, 'monthly')]) == list(days('2023-01-31', '2023-02-07'))
+    with pytest.raises(ValueError):
+        period_ends(calendar, 'yearly')
+
+
+def test_panel_matches_the_datasets():
+    panel = load_panel()
+    dates = panel.dates()
+    assert np.is_busday(dates.astype('datetime64[D]')).all()
+    for fund, managers in panel.funds.items():
+        dataset = load_dataset(fund)
+        frame = panel.frame(funds=[fund])
+        assert list(frame.columns.get_level_values('Manager')) == managers
+        # every business day row of the dataset is in the panel as it is
+        on_calendar = np.isin(dataset.index, dates)
+        expected = dataset.values()[on_calendar]
+        np.testing.assert_array_equal(frame.loc[dataset.index[on_calendar]].to_numpy(), expected)
+
+
+def test_window_is_a_view():
+    panel = load_panel()
+    dates, values = panel.window('2021-01-01', '2021-12-31', 'monthly', normalized=True, funds=['fundC'])
+    assert len(dates) == 12 and np.shares_memory(values, panel.window(resolution='monthly', normalized=True)[1])
+    assert values.shape[1] == len(panel.funds['fundC'])
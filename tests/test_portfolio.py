@@ -0,0 +1,103 @@
+import base64
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fixed_income import portfolio
+from fixed_income.portfolio import RESULT_COLUMNS, holding_returns, load_results, process_holdings, results_page
+from utils import jobs
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(portfolio, 'UPLOAD_DIR', tmp_path)
+    portfolio.order_cache.clear()
+    return tmp_path
+
+
+def holdings(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'coupon': rng.uniform(0, 10, n).round(3), 'maturity': rng.uniform(0.5, 30, n).round(2),
+                         'notional': rng.uniform(1e5, 1e7, n).round(0), 'start_yield': rng.uniform(0, 8, n).round(3),
+                         'end_yield': rng.uniform(0, 8, n).round(3)})
+
+
+def upload(frame):
+    contents = 'data:text/csv;base64,' + base64.b64encode(frame.to_csv(index=False).encode()).decode()
+    return portfolio.save_holdings(contents)
+
+
+def test_chunks_match_one_pass(uploads):
+    frame = holdings()
+    name = upload(frame)
+    progress = []
+    summary = process_holdings(name, dt=0.5, freq=2, chunk_rows=64, progress=lambda f, m='': progress.append(f))
+    X = load_results(summary['results'])
+    expected = holding_returns(frame, 0.5, 2)
+    np.testing.assert_allclose(X, expected, rtol=1e-12)
+    assert summary['holdings'] == len(frame) and summary['skipped'] == 0
+    assert len(progress) == -(-len(frame)//64) and progress[-1] == 1
+
+    value = expected[:, RESULT_COLUMNS.index('value')]
+    exact = expected[:, RESULT_COLUMNS.index('exact')]
+    np.testing.assert_allclose(summary['exact'], value @ exact/value.sum())
+    np.testing.assert_allclose(summary['max_error_jm'], np.abs(expected[:, RESULT_COLUMNS.index('error_jm')]).max())
+
+
+def test_invalid_rows_are_skipped(uploads):
+    frame = holdings(10).astype(object)
+    frame.loc[2, 'coupon'] = 'n/a'
+    frame.loc[5, 'end_yield'] = None
+    frame.loc[7, 'maturity'] = 0
+    summary = process_holdings(upload(frame), chunk_rows=4)
+    assert summary['holdings'] == 7 and summary['skipped'] == 3
+    rows = load_results(summary['results'])[:, 0]
+    np.testing.assert_array_equal(rows, [1, 2, 4, 5, 7, 9, 10])
+
+
+def test_missing_columns(uploads):
+    with pytest.raises(ValueError, match='notional'):
+        process_holdings(upload(holdings(5).drop(columns='notional')))
+
+
+def test_sorted_pages(uploads):
+    summary = process_holdings(upload(holdings(95)), chunk_rows=10)
+    X = load_results(summary['results'])
+    col = RESULT_COLUMNS.index('error_jm')
+    pages = [results_page(summary['results'], page, 20, 'error_jm', descending=True) for page in range(5)]
+    np.testing.assert_array_equal(np.vstack(pages), X[np.argsort(-X[:, col], kind='stable')])
+    np.testing.assert_array_equal(results_page(summary['results'], 4, 20), X[80:])
+    assert len(results_page(summary['results'], 5, 20)) == 0
+
+
+@pytest.mark.parametrize('name', ['/tmp/evil', '../evil', '../../' + 'a'*16, 'ABCDEF0123456789', 'a'*15, None, 7])
+def test_names_outside_the_uploads_are_rejected(uploads, name):
+    with pytest.raises(ValueError, match='not an uploaded file'):
+        process_holdings(name)
+    assert not list(uploads.iterdir())
+
+
+def submit_request(name, months=12, freq=1):
+    inputs = [('portfolio-file', name), ('portfolio-horizon', months), ('portfolio-freq', freq)]
+    return {'output': 'portfolio-job.data', 'outputs': {'id': 'portfolio-job', 'property': 'data'},
+            'inputs': [{'id': i, 'property': 'value' if i != 'portfolio-file' else 'data', 'value': v} for i, v in inputs],
+            'changedPropIds': ['portfolio-file.data']}
+
+
+@pytest.mark.parametrize('name, months, freq', [('/tmp/evil', 12, 1), ('a'*16, 12, 3), ('a'*16, 'x', 1)])
+def test_callback_submits_nothing_for_forged_values(name, months, freq, monkeypatch):
+    app = pytest.importorskip('app')
+    submitted = []
+    monkeypatch.setattr(jobs, 'submit', lambda *args, **kwargs: submitted.append(kwargs))
+    response = app.server.test_client().post('/_dash-update-component', json=submit_request(name, months, freq))
+    assert response.status_code == 204 and not submitted
+
+
+def test_callback_clamps_the_horizon(monkeypatch):
+    app = pytest.importorskip('app')
+    submitted = []
+    monkeypatch.setattr(jobs, 'submit', lambda *args, **kwargs: submitted.append(kwargs) or 'key')
+    app.server.test_client().post('/_dash-update-component', json=submit_request('a'*16, 10**9, 2))
+    assert submitted == [{'name': 'a'*16, 'dt': 1.0, 'freq': 2}]
+
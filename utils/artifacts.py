@@ -0,0 +1,87 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ARTIFACT_DIR = ROOT / 'build' / 'figures'
+
+# bump when the artifact layout changes so stale files are never read
+ARTIFACT_VERSION = 1
+
+FIGURES = {}
+_loaded = {}
+_lock = threading.Lock()
+
+
+def register_figure(name, builder, inputs=()):
+    """Declare a figure built by builder() from the given repo relative input files.
+
+    The file defining builder is always part of the hash, so editing the
+    builder or any listed data/code input triggers a rebuild. Inputs may not
+    exist yet (rows ingested later, for instance): they count once they do.
+    """
+    sources = [Path(inspect.getsourcefile(builder)).resolve()] + [ROOT / p for p in inputs]
+    FIGURES[name] = {'builder': builder, 'sources': sources}
+
+
+def figure_key(name):
+    h = hashlib.sha256(f'{name}:{ARTIFACT_VERSION}'.encode())
+    for path in FIGURES[name]['sources']:
+        h.update(path.read_bytes() if path.exists() else b'-')
+    return h.hexdigest()[:16]
+
+
+def artifact_path(name):
+    return ARTIFACT_DIR / f'{name}-{figure_key(name)}.json'
+
+
+def build_figure(name, force=False):
+    """Write the artifact for a figure unless an up to date one exists; returns its path."""
+    path = artifact_path(name)
+    if force or not path.exists():
+        fig = FIGURES[name]['builder']()
+        ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(fig.to_json())
+        os.replace(tmp, path)
+        for stale in ARTIFACT_DIR.glob(f'{name}-*.json'):
+            if stale != path:
+                stale.unlink()
+    return path
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _stamp(name):
+    return tuple(_mtime(path) for path in FIGURES[name]['sources'])
+
+
+def figures_stamp(names):
+    """Modification times of the sources of the named figures, changing whenever one may need a rebuild."""
+    return tuple(_stamp(name) for name in names)
+
+
+def load_figure(name):
+    """Figure dict for a registered figure, read once per process from its artifact.
+
+    Only figures whose sources changed since they were read (for instance
+    after funds.ingest appended to their data) are reloaded.
+    """
+    stamp = _stamp(name)
+    if name not in _loaded or _loaded[name][0] != stamp:
+        with _lock:
+            if name not in _loaded or _loaded[name][0] != stamp:
+                _loaded[name] = (stamp, json.loads(build_figure(name).read_text()))
+    return _loaded[name][1]
+
+
+def build_all(force=False):
+    return {name: build_figure(name, force) for name in FIGURES}
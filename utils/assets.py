@@ -0,0 +1,159 @@
+import functools
+import gzip
+import hashlib
+import mimetypes
+import shutil
+import threading
+from pathlib import Path
+
+import flask
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+ROOT = Path(__file__).resolve().parents[1]
+ASSETS_DIR = ROOT / 'assets'
+BUILD_DIR = ROOT / 'build' / 'assets'
+URL_PREFIX = '/static-assets/'
+
+# the data files are read by the app, not by browsers
+SKIP_DIRS = ('data',)
+PRECOMPRESS = ('.css', '.js', '.json', '.svg', '.html', '.txt', '.map')
+COMPRESS_MIMETYPES = ('application/json', 'application/javascript', 'text/javascript', 'text/html',
+                      'text/css', 'text/plain', 'image/svg+xml')
+COMPRESS_MIN_BYTES = 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+_compressed = {}
+_lock = threading.Lock()
+
+
+def _sources():
+    for path in sorted(ASSETS_DIR.rglob('*')):
+        rel = path.relative_to(ASSETS_DIR)
+        if path.is_file() and rel.parts[0] not in SKIP_DIRS:
+            yield rel
+
+
+@functools.lru_cache(maxsize=None)
+def fingerprint(rel):
+    """Content hashed name of an asset, e.g. custom_css.1a2b3c4d5e.css."""
+    rel = Path(rel)
+    digest = hashlib.sha256((ASSETS_DIR / rel).read_bytes()).hexdigest()[:10]
+    return (rel.parent / f'{rel.stem}.{digest}{rel.suffix}').as_posix()
+
+
+def build_assets():
+    """Copy assets under their fingerprinted names, with .gz/.br siblings for text files.
+
+    Earlier fingerprints are kept so pages already open in a browser keep working.
+    """
+    built = {}
+    for rel in _sources():
+        target = BUILD_DIR / fingerprint(rel)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(ASSETS_DIR / rel, target)
+            if target.suffix.lower() in PRECOMPRESS:
+                data = target.read_bytes()
+                target.with_name(target.name + '.gz').write_bytes(gzip.compress(data, 9, mtime=0))
+                if brotli is not None:
+                    target.with_name(target.name + '.br').write_bytes(brotli.compress(data, quality=11))
+        built[rel.as_posix()] = target
+    return built
+
+
+def asset_url(rel):
+    """URL of an asset: its fingerprinted copy when built, otherwise Dash's assets route."""
+    name = fingerprint(rel)
+    if (BUILD_DIR / name).exists():
+        return URL_PREFIX + name
+    return '/assets/' + Path(rel).as_posix()
+
+
+def parse_accept_encoding(header):
+    """{coding: q-value} of an Accept-Encoding header, codings lower case."""
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def _preferred(encodings):
+    # the client's highest q-value among encodings, ours breaking ties; a
+    # coding it lists with q=0 (or leaves to a '*;q=0') is never used
+    qualities = parse_accept_encoding(flask.request.headers.get('Accept-Encoding', ''))
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def response_encoding():
+    """Encoding compress_response uses for the current request ('br', 'gzip' or None)."""
+    return _preferred(('br', 'gzip') if brotli is not None else ('gzip',))
+
+
+def serve_asset(filename):
+    suffixes = {'br': '.br', 'gzip': '.gz'}
+    encoding = _preferred([e for e, suffix in suffixes.items() if (BUILD_DIR / (filename + suffix)).is_file()])
+    if encoding is None:
+        response = flask.send_from_directory(BUILD_DIR, filename)
+    else:
+        response = flask.send_from_directory(BUILD_DIR, filename + suffixes[encoding],
+                                             mimetype=mimetypes.guess_type(filename)[0])
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def compress_response(response):
+    """Compress JSON, JS, CSS and HTML responses (layout, callbacks, bundles) on the fly."""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    encoding = response_encoding()
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    # component bundles are immutable per URL, compress each one only once
+    key = (flask.request.full_path, encoding) if flask.request.path.startswith('/_dash-component-suites/') else None
+    body = _compressed.get(key) if key else None
+    if body is None:
+        if encoding == 'br':
+            body = brotli.compress(data, quality=4)
+        else:
+            body = gzip.compress(data, 5)
+        if key:
+            with _lock:
+                _compressed[key] = body
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(server):
+    server.add_url_rule(URL_PREFIX + '<path:filename>', 'static_assets', serve_asset)
+    server.after_request(compress_response)
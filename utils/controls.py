@@ -0,0 +1,33 @@
+"""Control rows shared by the pages, and checks of the values they send.
+
+A callback receives whatever the request carries, not only what its sliders
+and radio items can produce, so pages pass those values through these first.
+"""
+from dash import html
+from dash.exceptions import PreventUpdate
+import dash_bootstrap_components as dbc
+
+
+def slider_row(label, component):
+    return dbc.Row([dbc.Col(html.Div(label), width=3), dbc.Col(component)], style={'margin-top':'15px'})
+
+
+def snap(value, min, max, step):
+    """value clamped to [min, max] and rounded to the slider's step."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise PreventUpdate
+    if value != value:
+        raise PreventUpdate
+    value = min if value < min else max if value > max else value
+    # round() keeps float steps (0.25) on the grid
+    return round(min + round((value - min)/step)*step, 10)
+
+
+def choice(value, options):
+    """The option equal to value, or no update when value is not one of them."""
+    for option in options:
+        if value == option and not isinstance(value, bool):
+            return option
+    raise PreventUpdate
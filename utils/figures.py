@@ -0,0 +1,93 @@
+"""Compact encoding of time series figures, decoded in the browser.
+
+encode_figure replaces the x and y lists of every trace over dates with
+base64 typed arrays: the dates of all traces are sent once, as a shared axis,
+and each trace keeps the positions of its points on it (uint16 when they fit)
+and its values (int16 for small whole numbers such as ranks, float32 when
+the rounding is invisible on the chart).
+assets/figures.js (which app.py links through its fingerprinted copy)
+rebuilds the traces; a page sends the encoded figure to a dcc.Store and
+decodes it into its dcc.Graph with
+
+    dash.clientside_callback(ClientsideFunction('figures', 'decode'),
+                             Output(graph_id, 'figure'), Input(store_id, 'data'))
+"""
+import base64
+import datetime
+
+import numpy as np
+
+DAY_NS = 86_400_000_000_000
+# float32 is used when it moves no value by more than this fraction of the
+# trace's range, far below a pixel
+FLOAT32_TOLERANCE = 1e-5
+
+
+def _pack(array, dtype):
+    array = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': array.dtype.str[1:], 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def _pack_values(y):
+    y = np.asarray(y, dtype=np.float64)
+    if np.all(np.isfinite(y)) and np.all(y == np.rint(y)) and np.all(np.abs(y) < 2**15):
+        return _pack(y, 'i2')
+    y32 = y.astype(np.float32)
+    finite = y[np.isfinite(y)]
+    span = finite.max() - finite.min() if finite.size else 0
+    if np.allclose(y32, y, rtol=0, atol=FLOAT32_TOLERANCE*span, equal_nan=True):
+        return _pack(y32, 'f4')
+    return _pack(y, 'f8')
+
+
+def _dates(x):
+    # nanoseconds since the epoch, None when x is not a date axis
+    if len(x) == 0:
+        return None
+    if isinstance(x, np.ndarray) and np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64)
+    # plotly serializes dates as ISO 8601 strings, which numpy parses as they
+    # are, and Figure.to_dict() keeps them as datetime objects
+    if not isinstance(x[0], (str, datetime.date)):
+        return None
+    try:
+        return np.array(x, dtype='datetime64[ns]').astype(np.int64)
+    except (ValueError, TypeError):
+        return None
+
+
+def encode_figure(fig):
+    """Figure dict with its date traces as binary arrays over a shared date axis."""
+    fig = fig if isinstance(fig, dict) else fig.to_dict()
+    traces = []
+    encoded = []
+    for trace in fig['data']:
+        x = trace.get('x')
+        dates = None if x is None or trace.get('y') is None or len(x) != len(trace['y']) else _dates(x)
+        traces.append((trace, dates))
+        if dates is not None:
+            encoded.append(dates)
+    if not encoded:
+        return {'data': fig['data'], 'layout': fig.get('layout', {})}
+
+    axis = np.unique(np.concatenate(encoded))
+    if np.all(axis % DAY_NS == 0):
+        dates = {**_pack(axis//DAY_NS, 'i4'), 'unit': 'D'}
+    else:
+        dates = {**_pack(axis/1e6, 'f8'), 'unit': 'ms'}
+    index_dtype = 'u2' if len(axis) <= 2**16 else 'u4'
+
+    layout = dict(fig.get('layout', {}))
+    data = []
+    for trace, x in traces:
+        if x is None:
+            data.append(trace)
+            continue
+        trace = {k: v for k, v in trace.items() if k != 'x'}
+        trace['xi'] = _pack(np.searchsorted(axis, x), index_dtype)
+        trace['y'] = _pack_values(trace['y'])
+        data.append(trace)
+        # numbers on a date axis are read as milliseconds since the epoch
+        name = 'xaxis' + trace.get('xaxis', 'x')[1:]
+        layout[name] = {**layout.get(name, {}), 'type': 'date'}
+    return {'data': data, 'layout': layout, 'dates': dates}
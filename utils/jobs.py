@@ -0,0 +1,251 @@
+"""Background jobs for computations too slow for a web request.
+
+    python -m utils.jobs --workers 2
+
+Jobs are module level functions called with keyword parameters and a
+progress(fraction, message='') callable. They are queued in a sqlite database
+under build/jobs (or JOBS_DIR) and run by worker processes, either started
+with the command above or by app.py in development. A job is identified by
+its function, the sources of its package and its parameters, so identical
+submissions share one run and finished results are reused until the code
+changes.
+"""
+import argparse
+import atexit
+import contextlib
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from utils.cache import LRUCache
+
+ROOT = Path(__file__).resolve().parents[1]
+JOBS_DIR = Path(os.environ.get('JOBS_DIR', ROOT / 'build' / 'jobs'))
+DB_PATH = JOBS_DIR / 'jobs.sqlite'
+RESULTS_DIR = JOBS_DIR / 'results'
+
+# a running job whose worker has not been heard from in this long is requeued
+STALE_SECONDS = 60
+HEARTBEAT_SECONDS = 10
+PROGRESS_SECONDS = 0.25
+KEEP_DAYS = 7
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY, task TEXT, params TEXT, status TEXT, progress REAL, message TEXT, error TEXT,
+    created REAL, started REAL, finished REAL, heartbeat REAL, worker INTEGER
+)'''
+
+results_cache = LRUCache('job_results', max_bytes=64*1024**2)
+
+
+def _connect():
+    new = not DB_PATH.exists()
+    if new:
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    # autocommit, workers share their connection with the heartbeat thread
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if new:
+        conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def _db():
+    conn = _connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(module):
+    # the whole package of the task, not only its module: a change to any
+    # helper it calls must not reuse results computed by the old code
+    package = sys.modules[module.split('.')[0]]
+    if hasattr(package, '__path__'):
+        top = Path(package.__path__[0])
+        files = sorted(top.rglob('*.py'))
+    else:
+        top = Path(inspect.getsourcefile(package)).parent
+        files = [Path(inspect.getsourcefile(package))]
+    h = hashlib.sha256()
+    for file in files:
+        h.update(file.relative_to(top).as_posix().encode())
+        h.update(file.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _result_path(key):
+    return RESULTS_DIR / f'{key}.pkl'
+
+
+def submit(func, **params):
+    """Queue func(**params, progress=...) unless an identical job is queued, running or done.
+
+    params must be JSON serializable. Returns the job key.
+    """
+    task = f'{func.__module__}:{func.__qualname__}'
+    params = json.dumps(params, sort_keys=True)
+    key = hashlib.sha256(f'{task}|{_source_hash(func.__module__)}|{params}'.encode()).hexdigest()[:16]
+    with _db() as conn:
+        row = conn.execute('SELECT status FROM jobs WHERE key=?', (key,)).fetchone()
+        if row is None:
+            conn.execute('INSERT OR IGNORE INTO jobs (key, task, params, status, progress, message, created) '
+                         "VALUES (?, ?, ?, 'queued', 0, '', ?)", (key, task, params, time.time()))
+        elif row['status'] == 'failed' or (row['status'] == 'done' and not _result_path(key).exists()):
+            conn.execute("UPDATE jobs SET status='queued', progress=0, message='', error=NULL, created=? "
+                         'WHERE key=?', (time.time(), key))
+    return key
+
+
+def status(key):
+    """Dict with the status ('queued', 'running', 'done' or 'failed'), progress, message and error."""
+    with _db() as conn:
+        row = conn.execute('SELECT status, progress, message, error FROM jobs WHERE key=?', (key,)).fetchone()
+    return dict(row) if row else None
+
+
+def result(key):
+    def load():
+        with open(_result_path(key), 'rb') as f:
+            return pickle.load(f)
+    return results_cache.get_or_compute(key, load)
+
+
+def _claim(conn):
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute("SELECT key, task, params FROM jobs WHERE status='queued' "
+                           "OR (status='running' AND heartbeat < ?) ORDER BY created LIMIT 1",
+                           (now - STALE_SECONDS,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE jobs SET status='running', started=?, heartbeat=?, worker=? WHERE key=?",
+                         (now, now, os.getpid(), row['key']))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return row
+
+
+def _run(conn, key, task, params):
+    lock = threading.Lock()
+    last = [0.0]
+
+    def progress(fraction, message=''):
+        now = time.monotonic()
+        if now - last[0] >= PROGRESS_SECONDS or fraction >= 1:
+            last[0] = now
+            with lock:
+                conn.execute('UPDATE jobs SET progress=?, message=?, heartbeat=? WHERE key=?',
+                             (float(fraction), message, time.time(), key))
+
+    # keeps the job claimed while the task runs without reporting progress
+    stop = threading.Event()
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            with lock:
+                conn.execute('UPDATE jobs SET heartbeat=? WHERE key=?', (time.time(), key))
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    try:
+        module, name = task.split(':')
+        value = getattr(importlib.import_module(module), name)(progress=progress, **json.loads(params))
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = RESULTS_DIR / f'{key}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _result_path(key))
+        outcome = ("UPDATE jobs SET status='done', progress=1, finished=? WHERE key=?", (time.time(), key))
+    except Exception as e:
+        traceback.print_exc()
+        outcome = ("UPDATE jobs SET status='failed', error=?, finished=? WHERE key=?",
+                   (f'{type(e).__name__}: {e}', time.time(), key))
+    finally:
+        stop.set()
+        beat.join()
+    conn.execute(*outcome)
+
+
+def prune(days=KEEP_DAYS):
+    """Forget finished jobs older than days, along with their results."""
+    cutoff = time.time() - days*86400
+    with _db() as conn:
+        keys = [row['key'] for row in conn.execute("SELECT key FROM jobs WHERE status IN ('done', 'failed') "
+                                                   'AND finished < ?', (cutoff,))]
+        conn.executemany('DELETE FROM jobs WHERE key=?', [(k,) for k in keys])
+    for key in keys:
+        _result_path(key).unlink(missing_ok=True)
+    return len(keys)
+
+
+def run_worker(poll=0.5, parent=None):
+    """Run queued jobs until the parent process (when given) goes away."""
+    if parent is not None:
+        # a parent that is a server (the gunicorn master) has its own handlers
+        for sig in (signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT, signal.SIGCHLD,
+                    signal.SIGUSR1, signal.SIGUSR2, signal.SIGTTIN, signal.SIGTTOU, signal.SIGWINCH):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+    conn = _connect()
+    while parent is None or os.getppid() == parent:
+        job = _claim(conn)
+        if job is None:
+            time.sleep(poll)
+        else:
+            _run(conn, job['key'], job['task'], job['params'])
+
+
+def start_workers(n=1):
+    """Start n worker processes bound to this one.
+
+    They are not daemonic, so jobs can use process pools of their own. They
+    are terminated when this process exits, and stop on their own if it is
+    killed.
+    """
+    prune()
+    workers = [multiprocessing.Process(target=run_worker, kwargs={'parent': os.getpid()}, daemon=False,
+                                       name=f'job-worker-{i}') for i in range(n)]
+    for worker in workers:
+        worker.start()
+    # processes forked from this one afterwards (server workers) inherit the
+    # handles, but the workers are not theirs to join or terminate
+    owner = os.getpid()
+    os.register_at_fork(after_in_child=lambda: multiprocessing.process._children.difference_update(workers))
+    # runs before multiprocessing's own exit handler, which would wait for them
+    atexit.register(lambda: os.getpid() == owner and [worker.terminate() for worker in workers])
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    workers = start_workers(args.workers)
+    print(f'{len(workers)} job worker(s) running on {DB_PATH}')
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
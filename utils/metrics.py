@@ -0,0 +1,256 @@
+import atexit
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import dash
+import flask
+
+try:
+    import fcntl
+except ImportError:  # no file locks on Windows, where there is one server process
+    fcntl = None
+
+ROOT = Path(__file__).resolve().parents[1]
+# one snapshot file per worker process, and the totals of the workers that
+# exited; /metrics adds them all up, so any worker can answer a scrape for the
+# whole server and no series ever goes down
+METRICS_DIR = Path(os.environ.get('METRICS_DIR', ROOT / 'build' / 'metrics'))
+RETIRED = 'retired.json'
+FLUSH_SECONDS = 5
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+_worker = f'{os.getpid()}-{time.time_ns()}'
+_last_flush = 0
+
+
+class Histogram:
+    """Fixed bucket histogram per label set, in the Prometheus text format."""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, value, *labels):
+        with _lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0]*(len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time spent serving a request.',
+                            ('route', 'method'), LATENCY_BUCKETS)
+RESPONSE_BYTES = Histogram('http_response_size_bytes', 'Size of the response body as sent.',
+                           ('route', 'method'), SIZE_BUCKETS)
+CALLBACK_SECONDS = Histogram('dash_callback_duration_seconds',
+                             'Time spent in a callback request, page renders are labelled by page.',
+                             ('callback',), LATENCY_BUCKETS)
+METRICS = (REQUEST_SECONDS, RESPONSE_BYTES, CALLBACK_SECONDS)
+
+
+def _callback_label(body):
+    output = body.get('output', '')
+    if '_pages_content' in output:
+        pathname = next((i.get('value') for i in body.get('inputs', []) if i.get('id') == '_pages_location'), None)
+        paths = {page['path'] for page in dash.page_registry.values()}
+        return 'page:' + (pathname if pathname in paths else 'other')
+    return output
+
+
+def _start_timer():
+    flask.g.metrics_start = time.perf_counter()
+
+
+def _record(response):
+    start = flask.g.pop('metrics_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    request = flask.request
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, route, request.method)
+    if not response.direct_passthrough:
+        RESPONSE_BYTES.observe(response.content_length or 0, route, request.method)
+    timing = f'app;dur={elapsed*1000:.1f}'
+    if route == '/_dash-update-component':
+        # dash has already parsed (and cached) the body
+        body = request.get_json(silent=True) or {}
+        CALLBACK_SECONDS.observe(elapsed, _callback_label(body))
+        timing += ';desc="callback"'
+    response.headers.add('Server-Timing', timing)
+
+    global _last_flush
+    if time.monotonic() - _last_flush > FLUSH_SECONDS:
+        flush()
+    return response
+
+
+def snapshot():
+    with _lock:
+        return {m.name: [[list(labels), list(series)] for labels, series in m.series.items()] for m in METRICS}
+
+
+def flush():
+    """Write this worker's series to its snapshot file."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    if _worker is None:
+        return
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = METRICS_DIR / f'{_worker}.tmp'
+    tmp.write_text(json.dumps(snapshot()))
+    os.replace(tmp, METRICS_DIR / f'{_worker}.json')
+
+
+def reset():
+    """Start a new snapshot for this process, without the series recorded so far.
+
+    Workers forked from a preloaded master call it first, so they neither
+    share the master's snapshot file nor count its warm-up requests.
+    """
+    global _worker, _last_flush
+    with _lock:
+        if _worker is not None:
+            (METRICS_DIR / f'{_worker}.json').unlink(missing_ok=True)
+        for m in METRICS:
+            m.series.clear()
+        _worker = f'{os.getpid()}-{time.time_ns()}'
+        _last_flush = 0
+
+
+@contextlib.contextmanager
+def _files_locked(exclusive):
+    # retiring moves series from a snapshot to the retired totals; readers
+    # must not see them in both, or in neither
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(METRICS_DIR / 'lock', 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _add(totals, data):
+    for name, series in data.items():
+        merged = totals.get(name)
+        if merged is None:
+            continue
+        for labels, values in series:
+            current = merged.setdefault(tuple(labels), [0]*len(values))
+            merged[tuple(labels)] = [a + b for a, b in zip(current, values)]
+
+
+def _retire(path):
+    # fold a snapshot into the retired totals, so the sums never go down
+    with _files_locked(exclusive=True):
+        data = _read(path)
+        if not data:
+            path.unlink(missing_ok=True)
+            return
+        totals = {m.name: {} for m in METRICS}
+        retired = METRICS_DIR / RETIRED
+        _add(totals, _read(retired))
+        _add(totals, data)
+        tmp = retired.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps({name: [[list(labels), values] for labels, values in series.items()]
+                                   for name, series in totals.items()}))
+        os.replace(tmp, retired)
+        path.unlink()
+
+
+def discard():
+    """Move this process's series to the retired totals, when it stops serving."""
+    global _worker
+    if _worker is None:
+        return
+    flush()
+    _retire(METRICS_DIR / f'{_worker}.json')
+    _worker = None
+
+
+# forked workers inherit it, and retire their own snapshot as they exit
+atexit.register(discard)
+
+
+def clear():
+    """Drop the snapshots and retired totals of earlier runs; call once before the workers start."""
+    for path in METRICS_DIR.glob('*.json'):
+        path.unlink(missing_ok=True)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Series of every worker added up per label set, those that exited included.
+
+    Snapshots left behind by workers that were killed before they could
+    retire them are retired on the way.
+    """
+    flush()
+    for path in METRICS_DIR.glob('*-*.json'):
+        if not _alive(int(path.stem.split('-')[0])):
+            _retire(path)
+    totals = {m.name: {} for m in METRICS}
+    with _files_locked(exclusive=False):
+        for path in METRICS_DIR.glob('*.json'):
+            _add(totals, _read(path))
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def exposition():
+    totals = collect()
+    lines = []
+    for m in METRICS:
+        lines += [f'# HELP {m.name} {m.help}', f'# TYPE {m.name} histogram']
+        for labels, values in sorted(totals[m.name].items()):
+            labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(m.labels, labels))
+            count = 0
+            for le, n in zip(m.buckets + ('+Inf',), values[:-1]):
+                count += n
+                lines.append(f'{m.name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f'{m.name}_sum{{{labels}}} {values[-1]}')
+            lines.append(f'{m.name}_count{{{labels}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics():
+    return flask.Response(exposition(), headers={'Cache-Control': 'no-store'},
+                          content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(server):
+    # after_request hooks run in reverse order, registering first means the
+    # response is measured once compressed
+    server.before_request(_start_timer)
+    server.after_request(_record)
+    server.add_url_rule('/metrics', 'metrics', metrics)
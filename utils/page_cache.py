@@ -0,0 +1,107 @@
+"""Page responses that only change with a deploy, served from memory.
+
+Pages opt in with dash.register_page(..., cache=True). Pages showing figures
+that are rebuilt from data between deploys list them with figures=[...], and
+their responses are recomputed once those figures' sources change.
+
+The page content callback response of these pages and the app layout are
+stored once per path and content encoding, as sent (already compressed), with
+an ETag derived from the body so conditional requests get a 304.
+"""
+import hashlib
+
+import dash
+import flask
+
+from utils.artifacts import figures_stamp
+from utils.assets import response_encoding
+from utils.cache import LRUCache
+
+PAGE_OUTPUT = '.._pages_content.children..._pages_store.data..'
+
+
+def page_request(pathname, search=''):
+    """Body of the page content callback request the browser sends for a path."""
+    return {'output': PAGE_OUTPUT,
+            'outputs': [{'id': '_pages_content', 'property': 'children'}, {'id': '_pages_store', 'property': 'data'}],
+            'inputs': [{'id': '_pages_location', 'property': 'pathname', 'value': pathname},
+                       {'id': '_pages_location', 'property': 'search', 'value': search}],
+            'changedPropIds': ['_pages_location.pathname']}
+
+
+response_cache = LRUCache('page_responses', max_bytes=32*1024**2)
+
+_app = None
+_pages = None
+
+
+def _cached_pages():
+    global _pages
+    if _pages is None:
+        _pages = {page['path']: page for page in dash.page_registry.values() if page.get('cache')}
+    return _pages
+
+
+def _cache_key():
+    request = flask.request
+    if request.path == '/_dash-layout' and request.method == 'GET':
+        if callable(_app.layout):
+            return None
+        key = ('layout',)
+    elif request.path == '/_dash-update-component' and request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        if body.get('output') != PAGE_OUTPUT:
+            return None
+        inputs = {i.get('property'): i.get('value') for i in body.get('inputs', [])}
+        page = _cached_pages().get(inputs.get('pathname'))
+        if page is None:
+            return None
+        key = ('page', page['path'], inputs.get('search') or '', figures_stamp(page.get('figures', ())))
+    else:
+        return None
+    return key + (response_encoding(),)
+
+
+def _respond(body, mimetype, encoding, etag):
+    if flask.request.if_none_match.contains(etag):
+        response = flask.Response(status=304)
+    else:
+        response = flask.Response(body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    # browsers may keep the layout but must check it is still current
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def serve_cached():
+    key = _cache_key()
+    if key is None:
+        return None
+    entry = response_cache.get(key)
+    if entry is None:
+        flask.g.page_cache_key = key
+        return None
+    return _respond(*entry)
+
+
+def store_response(response):
+    key = flask.g.pop('page_cache_key', None)
+    if key is None or response.status_code != 200 or response.direct_passthrough:
+        return response
+    body = response.get_data()
+    entry = (body, response.mimetype, response.headers.get('Content-Encoding'),
+             hashlib.sha256(body).hexdigest()[:20])
+    response_cache.put(key, entry)
+    return _respond(*entry)
+
+
+def init_app(app):
+    # register between metrics and assets: after_request hooks run in reverse
+    # order, so responses are stored once compressed and measured once served
+    global _app
+    _app = app
+    app.server.before_request(serve_cached)
+    app.server.after_request(store_response)
@@ -0,0 +1,66 @@
+"""Production entry point: the app with everything its pages read already loaded.
+
+    gunicorn            # settings in gunicorn.conf.py
+
+With preload_app the import below runs once in the gunicorn master: stores,
+the aligned fund panel, figure artifacts, the error grid and the cached page
+responses are built or loaded there and then frozen, so every forked worker
+starts warm and shares them copy-on-write. A SIGHUP runs prepare() again in
+the master before new workers are forked, which picks up new fund data and
+rebuilt artifacts; code changes (assets included) need a restart.
+"""
+import gc
+import time
+
+import dash
+
+from fixed_income import load_error_grid
+from funds import DATASETS, convert_all, load_dataset, load_panel
+from utils import metrics
+from utils.artifacts import FIGURES, build_all, load_figure
+from utils.assets import brotli, build_assets
+from utils.page_cache import page_request
+
+# the app resolves its asset URLs and page layouts once, at import: the
+# stores and fingerprinted assets they point to must exist by then
+convert_all()
+build_assets()
+
+from app import server  # noqa: E402
+
+
+def warm_up():
+    """Build what is missing or stale and load it, then render the cached pages."""
+    convert_all()
+    build_assets()
+    build_all()
+    for name in DATASETS:
+        load_dataset(name)
+    load_panel()
+    for name in FIGURES:
+        load_figure(name)
+    load_error_grid()
+
+    client = server.test_client()
+    for encoding in ('gzip', 'br') if brotli is not None else ('gzip',):
+        headers = {'Accept-Encoding': encoding}
+        client.get('/', headers=headers)
+        client.get('/_dash-layout', headers=headers)
+        for page in dash.page_registry.values():
+            if page.get('cache'):
+                client.post('/_dash-update-component', json=page_request(page['path']), headers=headers)
+
+
+def prepare():
+    start = time.perf_counter()
+    warm_up()
+    # warm-up requests are not traffic
+    metrics.reset()
+    # move everything loaded so far out of the collector's reach, so it never
+    # writes to (and unshares) the pages holding these objects
+    gc.collect()
+    gc.freeze()
+    return time.perf_counter() - start
+
+
+ready_seconds = prepare()